@@ -0,0 +1,98 @@
+import functools
+import hashlib
+
+from django.http import HttpResponseNotModified, JsonResponse
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+
+from config.pagination import paginate_by_cursor
+
+
+def api_view(view):
+    """
+    Session-authenticated, read-only JSON endpoint for approved members.
+
+    Errors come back as JSON with a status code instead of the HTML views'
+    login redirects.
+    """
+    @functools.wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            response = error(405, 'Read-only endpoint.')
+            response['Allow'] = 'GET, HEAD'
+            return response
+        if not request.user.is_authenticated:
+            return error(401, 'Authentication required.')
+        if not request.user.is_approved:
+            return error(403, 'Account pending approval.')
+        response = view(request, *args, **kwargs)
+        patch_vary_headers(response, ['Cookie'])
+        # Clients may keep responses but must revalidate them with the ETag.
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+    return wrapper
+
+
+def error(status, message):
+    return JsonResponse({'error': message}, status=status)
+
+
+class FieldError(ValueError):
+    pass
+
+
+def parse_fields(request, serializers):
+    """The ``?fields=a,b`` sparse fieldset, in declaration order; all fields by default."""
+    requested = request.GET.get('fields')
+    if not requested:
+        return list(serializers)
+    names = {name.strip() for name in requested.split(',') if name.strip()}
+    unknown = names - set(serializers)
+    if unknown:
+        raise FieldError(f"Unknown field(s): {', '.join(sorted(unknown))}.")
+    return [name for name in serializers if name in names]
+
+
+def page_etag(rows, fields, version, next_cursor):
+    """
+    Strong ETag for one page: what was asked for and the version of every row on it.
+
+    ``version(obj)`` must change whenever any serialised value of ``obj`` can,
+    e.g. its ``updated_at`` plus counters that are bumped with F() updates.
+    """
+    digest = hashlib.sha256(','.join(fields).encode())
+    for obj in rows:
+        digest.update(repr((obj.pk, *version(obj))).encode())
+    digest.update((next_cursor or '').encode())
+    return f'"{digest.hexdigest()[:32]}"'
+
+
+def json_page(request, queryset, serializers, version, field='created_at'):
+    """
+    One cursor-paginated page of ``queryset`` as JSON.
+
+    ``serializers`` maps each public field name to a function of the object.
+    The rows are fetched either way, but a matching ``If-None-Match`` skips
+    serialisation and the body entirely.
+    """
+    try:
+        fields = parse_fields(request, serializers)
+    except FieldError as exc:
+        return error(400, str(exc))
+
+    page = paginate_by_cursor(queryset, request.GET.get('cursor'), field=field)
+    etag = page_etag(page, fields, version, page.next_cursor)
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = JsonResponse({
+            'results': [{name: serializers[name](obj) for name in fields} for obj in page],
+            'next': page.next_cursor,
+            'previous': page.prev_cursor,
+        })
+    response['ETag'] = etag
+    return response
+
+
+def file_url(field_file):
+    return field_file.url if field_file else None
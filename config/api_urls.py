@@ -0,0 +1,14 @@
+from django.urls import path
+
+from events import api as events_api
+from reports import api as reports_api
+from users import api as users_api
+
+app_name = 'api'
+
+urlpatterns = [
+    path('reports/', reports_api.report_list, name='report_list'),
+    path('reports/<int:pk>/comments/', reports_api.comment_list, name='comment_list'),
+    path('events/', events_api.event_list, name='event_list'),
+    path('notices/', users_api.notice_list, name='notice_list'),
+]
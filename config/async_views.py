@@ -0,0 +1,53 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connections
+from django.shortcuts import render
+
+
+def _on_own_connection(query):
+    def run():
+        try:
+            return query()
+        finally:
+            # Pool threads outlive the request; don't leave their connections open.
+            connections.close_all()
+    return run
+
+
+async def gather_queries(**queries):
+    """
+    Evaluate independent ORM calls concurrently and return their results by name.
+
+    Each zero-argument callable runs on its own pool thread and database
+    connection. Django's own async ORM methods all funnel through one thread,
+    so they would still run one after another. Results must be fully
+    evaluated (``list()``, ``count()``): a lazy queryset would only hit the
+    database later, back on the rendering thread.
+
+    With ASYNC_QUERY_CONCURRENCY off, the calls run one by one on the
+    request's thread instead, which keeps them inside any open transaction.
+    """
+    if not settings.ASYNC_QUERY_CONCURRENCY:
+        results = {}
+        for name, query in queries.items():
+            results[name] = await sync_to_async(query)()
+        return results
+    values = await asyncio.gather(*(
+        sync_to_async(_on_own_connection(query), thread_sensitive=False)()
+        for query in queries.values()
+    ))
+    return dict(zip(queries, values))
+
+
+async def request_user(request):
+    """Resolve the user without blocking, and share it with sync code that reads ``request.user``."""
+    user = await request.auser()
+    request.user = user
+    return user
+
+
+async def arender(request, template_name, context):
+    # Context processors and templates may still touch the ORM.
+    return await sync_to_async(render)(request, template_name, context)
@@ -0,0 +1,47 @@
+"""
+A file-based cache that worker processes on one host can share.
+
+Django's FileBasedCache culls random entries once MAX_ENTRIES is reached and
+implements incr() as a get followed by a set. Both break the versioned keys
+(users.notifications, users.stats): a culled version restarts at 1 and
+brings old entries back, and two processes bumping at once can both write
+the same number. Here entries stored without a timeout are never culled,
+and incr() runs under an exclusive lock on a file in the cache directory.
+"""
+import os
+import pickle
+import random
+
+from django.core.cache.backends import filebased
+from django.core.files import locks
+
+
+class FileBasedCache(filebased.FileBasedCache):
+    lock_name = 'incr.lock'
+
+    def incr(self, key, delta=1, version=None):
+        self._createdir()
+        with open(os.path.join(self._dir, self.lock_name), 'ab') as lock:
+            locks.lock(lock, locks.LOCK_EX)
+            try:
+                return super().incr(key, delta, version)
+            finally:
+                locks.unlock(lock)
+
+    def _is_permanent(self, fname):
+        try:
+            with open(fname, 'rb') as f:
+                return pickle.load(f) is None
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            return False
+
+    def _cull(self):
+        filelist = self._list_cache_files()
+        num_entries = len(filelist)
+        if num_entries < self._max_entries:
+            return
+        candidates = [fname for fname in filelist if not self._is_permanent(fname)]
+        if self._cull_frequency:
+            candidates = random.sample(candidates, min(len(candidates), num_entries // self._cull_frequency))
+        for fname in candidates:
+            self._delete(fname)
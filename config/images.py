@@ -0,0 +1,102 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+
+VARIANT_WIDTHS = (320, 640, 1280)
+
+VARIANT_FORMATS = {
+    'webp': ('WEBP', 'webp', {'quality': 80, 'method': 4}),
+    'jpeg': ('JPEG', 'jpg', {'quality': 82, 'optimize': True, 'progressive': True}),
+}
+
+
+def _has_alpha(image):
+    return image.mode in ('RGBA', 'LA') or (image.mode == 'P' and 'transparency' in image.info)
+
+
+def _prepare(image, fmt):
+    if fmt == 'jpeg':
+        if _has_alpha(image):
+            rgba = image.convert('RGBA')
+            background = Image.new('RGB', rgba.size, (255, 255, 255))
+            background.paste(rgba, mask=rgba.getchannel('A'))
+            return background
+        return image.convert('RGB')
+    return image.convert('RGBA' if _has_alpha(image) else 'RGB')
+
+
+def variant_widths(original_width):
+    widths = [w for w in VARIANT_WIDTHS if w < original_width]
+    widths.append(min(original_width, VARIANT_WIDTHS[-1]))
+    return sorted(set(widths))
+
+
+def build_variants(field_file):
+    """
+    Write downscaled WebP and JPEG copies of an uploaded image next to it.
+
+    Returns the dict stored in the model's ``*_variants`` field, or an empty
+    dict when the file is missing or is not an image Pillow can read.
+    """
+    try:
+        with field_file.open('rb') as f:
+            image = Image.open(f)
+            image.load()
+    except (OSError, UnidentifiedImageError, ValueError):
+        return {}
+
+    # Bake in the camera orientation before the EXIF block is dropped.
+    image = ImageOps.exif_transpose(image)
+    storage = field_file.storage
+    directory, filename = os.path.split(field_file.name)
+    stem = os.path.splitext(filename)[0]
+
+    variants = {'source': field_file.name, 'width': image.width}
+    for fmt, (pil_format, extension, options) in VARIANT_FORMATS.items():
+        prepared = _prepare(image, fmt)
+        variants[fmt] = {}
+        for width in variant_widths(image.width):
+            height = max(1, round(image.height * width / image.width))
+            resized = prepared.resize((width, height), Image.LANCZOS)
+            resized.info = {}
+            buffer = BytesIO()
+            resized.save(buffer, pil_format, **options)
+            name = storage.save(
+                f'{directory}/variants/{stem}-{width}w.{extension}',
+                ContentFile(buffer.getvalue()),
+            )
+            variants[fmt][str(width)] = name
+    return variants
+
+
+def variant_names(variants):
+    return [name for fmt in VARIANT_FORMATS for name in (variants or {}).get(fmt, {}).values()]
+
+
+def variants_are_current(field_file, variants):
+    return bool(field_file) and variants.get('source') == field_file.name
+
+
+def refresh_variants(instance, field_name, force=False):
+    """Regenerate variants for ``instance.<field_name>`` if the upload changed."""
+    field_file = getattr(instance, field_name)
+    variants_field = f'{field_name}_variants'
+    current = getattr(instance, variants_field) or {}
+
+    if not field_file:
+        variants = {}
+    elif force or not variants_are_current(field_file, current):
+        variants = build_variants(field_file)
+    else:
+        return current
+
+    # Every stored variant holds a storage reference; give back the old ones.
+    for name in variant_names(current):
+        field_file.storage.delete(name)
+    if variants != current:
+        type(instance).objects.filter(pk=instance.pk).update(**{variants_field: variants})
+        setattr(instance, variants_field, variants)
+    return variants
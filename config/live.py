@@ -0,0 +1,133 @@
+"""
+In-process publish/subscribe for the Server-Sent Events feeds.
+
+Model signals publish from whatever thread saved the row; each subscriber is
+an async stream with a bounded queue on the ASGI event loop. A subscriber
+that falls behind is sent a ``reset`` event and disconnected instead of
+letting its queue grow, and the number of open streams is capped. This only
+reaches clients connected to the same process: run one ASGI worker per feed,
+or accept that other workers' clients see changes on their next reload.
+"""
+import asyncio
+import itertools
+import json
+import threading
+
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, StreamingHttpResponse
+
+
+class TooManySubscribers(Exception):
+    pass
+
+
+class Subscription:
+    def __init__(self, topics, queue_size):
+        self.topics = frozenset(topics)
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+    def offer(self, message):
+        # Runs on the subscriber's loop, so the queue needs no extra locking.
+        if self.overflowed:
+            return
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.overflowed = True
+            self.queue.get_nowait()
+            self.queue.put_nowait(None)
+
+
+class Broker:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = set()
+        self._ids = itertools.count(1)
+
+    def __len__(self):
+        return len(self._subscriptions)
+
+    def subscribe(self, topics):
+        with self._lock:
+            if len(self._subscriptions) >= settings.LIVE_MAX_CONNECTIONS:
+                raise TooManySubscribers
+            subscription = Subscription(topics, settings.LIVE_QUEUE_SIZE)
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, topic, event, data):
+        """Hand ``data`` to every subscriber of ``topic``; safe to call from any thread."""
+        message = (next(self._ids), event, json.dumps(data, cls=DjangoJSONEncoder))
+        with self._lock:
+            targets = [s for s in self._subscriptions if topic in s.topics]
+        for subscription in targets:
+            try:
+                subscription.loop.call_soon_threadsafe(subscription.offer, message)
+            except RuntimeError:
+                # The stream's loop has closed; its finally block unsubscribes it.
+                pass
+
+
+broker = Broker()
+
+
+def format_event(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines.append(f'event: {event}')
+    lines.extend(f'data: {line}' for line in data.splitlines() or [''])
+    return '\n'.join(lines) + '\n\n'
+
+
+async def event_stream(subscription):
+    try:
+        yield f"retry: {settings.LIVE_RETRY_MS}\n\n"
+        while True:
+            try:
+                message = await asyncio.wait_for(subscription.queue.get(), settings.LIVE_HEARTBEAT)
+            except asyncio.TimeoutError:
+                # A comment line keeps proxies from closing an idle connection.
+                yield ': keepalive\n\n'
+                continue
+            if message is None:
+                yield format_event('reset', '{}')
+                return
+            event_id, event, data = message
+            yield format_event(event, data, event_id)
+    finally:
+        broker.unsubscribe(subscription)
+
+
+def live_updates_enabled():
+    """Whether pages should open the feeds: only ASGI deployments serve them."""
+    return settings.ASYNC_VIEWS
+
+
+def stream_response(request, topics):
+    """
+    An SSE response for ``topics``, or 503 once the connection cap is reached.
+
+    Under WSGI a stream would hold a worker thread for as long as the client
+    stays connected, so the answer is 204, which tells EventSource to stop
+    reconnecting.
+    """
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=204)
+    try:
+        subscription = broker.subscribe(topics)
+    except TooManySubscribers:
+        response = HttpResponse('Too many live connections.', status=503, content_type='text/plain')
+        response['Retry-After'] = str(settings.LIVE_RETRY_MS // 1000)
+        return response
+    response = StreamingHttpResponse(event_stream(subscription), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
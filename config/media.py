@@ -0,0 +1,165 @@
+"""
+Uploaded files served through a view, so access checks run on every request.
+
+Single ``Range`` requests get ``206 Partial Content``, which lets a video
+player seek without re-downloading the clip. Under WSGI the response hands
+the open file to the server, which can use ``os.sendfile()``. Under ASGI the
+file is read in chunks on a worker thread. Behind nginx or Apache, set
+MEDIA_ACCEL and the proxy sends the bytes (and handles ranges) itself once
+the view has allowed the request.
+"""
+import mimetypes
+import os
+import re
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, HttpResponse, HttpResponseNotModified, StreamingHttpResponse
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+
+from config.storage import is_content_addressed
+
+
+RANGE = re.compile(r'^bytes=(\d*)-(\d*)$')
+BLOCK_SIZE = 64 * 1024
+
+
+class RangeFile:
+    """
+    ``length`` bytes of an open file from its current position.
+
+    Keeps ``fileno()`` so a WSGI server's sendfile path can use it; those
+    servers stop at the response's Content-Length.
+    """
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size) if size else b''
+        self.remaining -= len(data)
+        return data
+
+    def fileno(self):
+        return self.file.fileno()
+
+    def close(self):
+        self.file.close()
+
+
+def parse_range(header, size):
+    """
+    ``(start, end)`` inclusive for a single satisfiable byte range, or None to
+    send the whole file. Raises ValueError when the range can't be satisfied.
+    Several ranges in one header are answered with the whole file, which
+    RFC 9110 allows.
+    """
+    match = RANGE.match(header.replace(' ', ''))
+    if not match or match.groups() == ('', ''):
+        return None
+    first, last = match.groups()
+    if not first:
+        # "bytes=-500": the final 500 bytes.
+        length = int(last)
+        if not length:
+            raise ValueError(header)
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size:
+        raise ValueError(header)
+    if end < start:
+        return None
+    return start, end
+
+
+def range_applies(request, etag, mtime):
+    """Whether to honour ``Range``; ``If-Range`` holding a stale validator means "send it all"."""
+    if_range = request.headers.get('If-Range')
+    if not if_range:
+        return True
+    if if_range.startswith(('"', 'W/')):
+        return if_range == etag
+    modified = parse_http_date_safe(if_range)
+    return modified is not None and int(mtime) <= modified
+
+
+async def _read_chunks(file):
+    read = sync_to_async(file.read, thread_sensitive=False)
+    try:
+        while chunk := await read(BLOCK_SIZE):
+            yield chunk
+    finally:
+        file.close()
+
+
+def _stream(request, file, content_type):
+    if isinstance(request, ASGIRequest):
+        # FileResponse's sync iterator would be read into memory whole under ASGI.
+        return StreamingHttpResponse(_read_chunks(file), content_type=content_type)
+    response = FileResponse(file, content_type=content_type)
+    response.block_size = BLOCK_SIZE
+    return response
+
+
+def accel_response(name, path, content_type):
+    response = HttpResponse(content_type=content_type)
+    if settings.MEDIA_ACCEL == 'x-accel':
+        response['X-Accel-Redirect'] = settings.MEDIA_ACCEL_PREFIX + name
+    else:
+        response['X-Sendfile'] = path
+    return response
+
+
+def serve_file(request, path, name):
+    """Respond with the file at ``path`` (stored as ``name``), honouring conditional and range headers."""
+    content_type = mimetypes.guess_type(name)[0] or 'application/octet-stream'
+    # Content-addressed names change whenever the bytes do.
+    cache_control = 'private, max-age=31536000, immutable' if is_content_addressed(name) else 'private, max-age=300'
+
+    if settings.MEDIA_ACCEL:
+        response = accel_response(name, path, content_type)
+        response['Cache-Control'] = cache_control
+        return response
+
+    try:
+        stat = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    etag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}"'
+    validators = {'ETag': etag, 'Last-Modified': http_date(stat.st_mtime), 'Cache-Control': cache_control}
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+        for header, value in validators.items():
+            response[header] = value
+        return response
+
+    byte_range = None
+    if 'Range' in request.headers and range_applies(request, etag, stat.st_mtime):
+        try:
+            byte_range = parse_range(request.headers['Range'], stat.st_size)
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+
+    file = open(path, 'rb')
+    if byte_range is None:
+        response = _stream(request, file, content_type)
+        response['Content-Length'] = stat.st_size
+    else:
+        start, end = byte_range
+        file.seek(start)
+        response = _stream(request, RangeFile(file, end - start + 1), content_type)
+        response.status_code = 206
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+        response['Content-Length'] = end - start + 1
+    response['Accept-Ranges'] = 'bytes'
+    for header, value in validators.items():
+        response[header] = value
+    return response
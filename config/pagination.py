@@ -0,0 +1,104 @@
+import base64
+from datetime import datetime
+
+from django.db.models import Q
+
+
+PAGE_SIZE = 20
+
+# Largest primary key a 64-bit integer column holds; a bigger one in a
+# cursor would make the database driver raise instead of matching nothing.
+MAX_PK = 2 ** 63 - 1
+
+
+def encode_cursor(obj, direction='next', field='created_at'):
+    raw = f"{direction}|{getattr(obj, field).isoformat()}|{obj.pk}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Return (direction, timestamp, pk) or None for a missing/garbled cursor."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        direction, value, pk = base64.urlsafe_b64decode(padded.encode()).decode().split('|')
+        pk = int(pk)
+        if direction not in ('next', 'prev') or not 0 <= pk <= MAX_PK:
+            return None
+        return direction, datetime.fromisoformat(value), pk
+    except (ValueError, OverflowError, UnicodeDecodeError):
+        return None
+
+
+class CursorPage:
+    def __init__(self, items, next_cursor=None, prev_cursor=None):
+        self.items = items
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    @property
+    def has_next(self):
+        return self.next_cursor is not None
+
+    @property
+    def has_previous(self):
+        return self.prev_cursor is not None
+
+
+def paginate_by_cursor(queryset, cursor, page_size=PAGE_SIZE, field='created_at'):
+    """
+    Keyset pagination over (field, id), newest first.
+
+    Every page is a single indexed range scan with LIMIT, so page 500 costs
+    the same as page 1 and rows inserted meanwhile never shift the window.
+    """
+    position = decode_cursor(cursor)
+    newest_first = (f'-{field}', '-id')
+
+    if position is None:
+        rows = list(queryset.order_by(*newest_first)[:page_size + 1])
+        has_more, has_before = len(rows) > page_size, False
+        rows = rows[:page_size]
+    else:
+        direction, value, pk = position
+        if direction == 'next':
+            rows = list(
+                queryset.filter(
+                    Q(**{f'{field}__lt': value}) | Q(**{field: value, 'id__lt': pk})
+                ).order_by(*newest_first)[:page_size + 1]
+            )
+            has_more, has_before = len(rows) > page_size, True
+            rows = rows[:page_size]
+        else:
+            rows = list(
+                queryset.filter(
+                    Q(**{f'{field}__gt': value}) | Q(**{field: value, 'id__gt': pk})
+                ).order_by(field, 'id')[:page_size + 1]
+            )
+            if not rows:
+                return paginate_by_cursor(queryset, None, page_size, field)
+            has_more, has_before = True, len(rows) > page_size
+            rows = rows[:page_size][::-1]
+
+    if not rows:
+        return CursorPage(rows)
+
+    return CursorPage(
+        rows,
+        next_cursor=encode_cursor(rows[-1], 'next', field) if has_more else None,
+        prev_cursor=encode_cursor(rows[0], 'prev', field) if has_before else None,
+    )
+
+
+def cursor_querystring(request, cursor):
+    """Current GET params (filters included) with the cursor swapped in."""
+    params = request.GET.copy()
+    params['cursor'] = cursor
+    return params.urlencode()
@@ -22,6 +22,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'config.timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -35,7 +36,8 @@ ROOT_URLCONF = 'config.urls'
 
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # DjangoTemplates that reports render time to config.timing.
+        'BACKEND': 'config.timing.TimedDjangoTemplates',
         'DIRS': [BASE_DIR / 'templates'],
         'APP_DIRS': True,
         'OPTIONS': {
@@ -44,6 +46,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'users.context_processors.unread_notifications',
             ],
         },
     },
@@ -54,10 +57,40 @@ WSGI_APPLICATION = 'config.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+        'NAME': os.environ.get('DJANGO_DB_NAME', BASE_DIR / 'db.sqlite3'),
+        # File-backed so tests that exercise concurrent writers get real connections.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
     }
 }
 
+# SQLite tuned for many concurrent writers:
+# - WAL lets readers carry on while one connection writes;
+# - synchronous=NORMAL is durable across crashes of the app (not of the OS) in WAL;
+# - BEGIN IMMEDIATE takes the write lock up front, so two transactions never
+#   deadlock upgrading from read to write, which busy_timeout cannot resolve;
+# - the timeout is how long a writer queues for the lock before "database is locked".
+SQLITE_PRODUCTION = {
+    'CONN_MAX_AGE': 600,
+    'CONN_HEALTH_CHECKS': True,
+    'OPTIONS': {
+        'transaction_mode': 'IMMEDIATE',
+        'timeout': 20,
+        'init_command': (
+            'PRAGMA journal_mode=WAL;'
+            'PRAGMA synchronous=NORMAL;'
+            'PRAGMA busy_timeout=20000;'
+            'PRAGMA mmap_size=268435456;'
+            'PRAGMA cache_size=-65536;'
+            'PRAGMA temp_store=MEMORY;'
+            'PRAGMA foreign_keys=ON'
+        ),
+    },
+}
+
+DATABASE_PROFILE = os.environ.get('DJANGO_DB_PROFILE', 'default')
+if DATABASE_PROFILE == 'production':
+    DATABASES['default'].update(SQLITE_PRODUCTION)
+
 AUTH_PASSWORD_VALIDATORS = [
     {'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator'},
     {'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator'},
@@ -71,17 +104,76 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = '/static/'
-STATIC_ROOT = BASE_DIR / 'staticfiles'
+STATIC_ROOT = os.environ.get('DJANGO_STATIC_ROOT', BASE_DIR / 'staticfiles')
 STATICFILES_DIRS = [BASE_DIR / 'static']
 
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Uploads are served by reports.views.serve_media after an access check.
+# Behind a proxy, hand the transfer back to it: 'x-accel' (nginx, with an
+# `internal` location at MEDIA_ACCEL_PREFIX aliased to MEDIA_ROOT) or
+# 'x-sendfile' (Apache mod_xsendfile, lighttpd).
+MEDIA_ACCEL = os.environ.get('DJANGO_MEDIA_ACCEL', '')
+MEDIA_ACCEL_PREFIX = '/protected-media/'
+
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    # Uploaded photos, videos and their variants, deduplicated by content hash.
+    'media': {'BACKEND': 'config.storage.ContentAddressedStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+}
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
 CRISPY_TEMPLATE_PACK = "bootstrap5"
 
+REPORT_VIDEO_MAX_SIZE = 200 * 1024 * 1024
+REPORT_VIDEO_CHUNK_SIZE = 2 * 1024 * 1024
+REPORT_VIDEO_TYPES = {
+    'video/mp4': ['.mp4', '.m4v'],
+    'video/quicktime': ['.mov'],
+    'video/3gpp': ['.3gp'],
+    'video/webm': ['.webm'],
+}
+
+# Background tasks (config.tasks). Eager mode runs them inline, so development
+# and tests need no worker; deployments run `manage.py run_tasks` instead.
+TASKS_EAGER = DEBUG
+TASKS_RETRY_DELAY = 30
+TASKS_STALE_AFTER = 15 * 60
+
+# DJANGO_ASYNC_VIEWS=1 serves the async variants of the dashboard views and
+# turns on the live SSE feeds; set it only for an ASGI server. It is off by
+# default, even under config.asgi, because the async dashboards measured
+# slower than the sync ones (`manage.py bench_views`).
+# ASYNC_QUERY_CONCURRENCY lets those variants run their independent queries
+# on separate connections at once.
+ASYNC_VIEWS = os.environ.get('DJANGO_ASYNC_VIEWS') == '1'
+ASYNC_QUERY_CONCURRENCY = True
+
+# Per-request timings (config.timing): every response gets a Server-Timing
+# header; requests slower than SLOW_REQUEST_MS are appended, with their SQL,
+# to a rotating JSONL log that `manage.py slow_request_report` summarises.
+SLOW_REQUEST_MS = int(os.environ.get('DJANGO_SLOW_REQUEST_MS', 500))
+SLOW_REQUEST_LOG = os.environ.get('DJANGO_SLOW_REQUEST_LOG', str(BASE_DIR / 'logs' / 'slow_requests.jsonl'))
+SLOW_REQUEST_LOG_MAX_BYTES = 10 * 1024 * 1024
+SLOW_REQUEST_LOG_BACKUPS = 5
+
+# Server-Sent Events feeds (config.live); served only under an ASGI server.
+LIVE_MAX_CONNECTIONS = 200
+LIVE_QUEUE_SIZE = 100
+LIVE_HEARTBEAT = 15
+LIVE_RETRY_MS = 5000
+
+# Sessions are read from the cache and written through to the database, and
+# the logged-in user comes from the cache too, so an authenticated request
+# needs no query before its view runs.
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+AUTH_USER_CACHE_TIMEOUT = 5 * 60
+
 LOGIN_URL = 'users:login'
 LOGIN_REDIRECT_URL = 'users:dashboard'
 LOGOUT_REDIRECT_URL = 'users:index'
@@ -0,0 +1,82 @@
+"""
+Deployment settings: select with DJANGO_SETTINGS_MODULE=config.settings_production.
+
+Everything not overridden here comes from config.settings. DJANGO_SECRET_KEY
+is required; DJANGO_ALLOWED_HOSTS (comma-separated) defaults to localhost.
+The cache lives in DJANGO_CACHE_DIR (default: cache/ next to manage.py).
+"""
+import copy
+import os
+
+from .settings import *  # noqa: F401,F403
+from .settings import BASE_DIR, DATABASES, SQLITE_PRODUCTION, STORAGES, TEMPLATES
+
+# Copies, so overriding them here leaves config.settings untouched.
+DATABASES = copy.deepcopy(DATABASES)
+STORAGES = copy.deepcopy(STORAGES)
+TEMPLATES = copy.deepcopy(TEMPLATES)
+
+DEBUG = False
+SECRET_KEY = os.environ['DJANGO_SECRET_KEY']
+ALLOWED_HOSTS = os.environ.get('DJANGO_ALLOWED_HOSTS', 'localhost').split(',')
+
+# Without DEBUG, Django stops recording every query in connection.queries.
+DATABASE_PROFILE = 'production'
+DATABASES['default'].update(SQLITE_PRODUCTION)
+
+# Compile each template once per process instead of on every render.
+# APP_DIRS can't be combined with explicit loaders.
+TEMPLATES[0]['APP_DIRS'] = False
+TEMPLATES[0]['OPTIONS']['loaders'] = [
+    ('django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ]),
+]
+TEMPLATES[0]['OPTIONS']['context_processors'] = [
+    # The debug processor only adds anything when DEBUG is on.
+    processor for processor in TEMPLATES[0]['OPTIONS']['context_processors']
+    if processor != 'django.template.context_processors.debug'
+]
+
+# Spelled out so development-only additions to config.settings stay out of
+# deployments. Static files are answered before sessions or auth run at all.
+# Flash messages travel in a signed cookie, so a redirect with a
+# message doesn't write the session row just to carry it.
+MIDDLEWARE = [
+    'config.timing.ServerTimingMiddleware',
+    'django.middleware.security.SecurityMiddleware',
+    'config.staticfiles.StaticFilesMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+MESSAGE_STORAGE = 'django.contrib.messages.storage.cookie.CookieStorage'
+
+# Version keys and unread counters must agree across worker processes, which
+# the default per-process memory cache can't do. config.cache never culls the
+# version keys and bumps them under a file lock (see its docstring).
+CACHES = {
+    'default': {
+        'BACKEND': 'config.cache.FileBasedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_DIR', BASE_DIR / 'cache'),
+        'OPTIONS': {'MAX_ENTRIES': 10000},
+    }
+}
+
+# `collectstatic` writes hashed names plus gzip/brotli copies for
+# config.staticfiles.StaticFilesMiddleware to serve.
+STORAGES['staticfiles'] = {'BACKEND': 'config.staticfiles.CompressedManifestStaticFilesStorage'}
+
+# Work is queued for `manage.py run_tasks` rather than run inside the request.
+TASKS_EAGER = False
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {'console': {'class': 'logging.StreamHandler'}},
+    'root': {'handlers': ['console'], 'level': 'WARNING'},
+}
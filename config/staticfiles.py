@@ -0,0 +1,158 @@
+"""
+Static files served by the application itself, without a front-end web server.
+
+``collectstatic`` writes a content-hashed copy of every file
+(``style.3f2a91c0e4b7.css``), plus gzip copies of the compressible ones and,
+when the optional ``brotli`` package is installed, brotli copies too. The
+middleware then answers ``STATIC_URL`` requests straight from ``STATIC_ROOT``:
+the best encoding the client accepts, with far-future immutable caching for
+hashed names, since a changed file gets a new name.
+"""
+import gzip
+import mimetypes
+import os
+import posixpath
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.staticfiles.storage import ManifestStaticFilesStorage, staticfiles_storage
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import http_date, parse_etags
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip copies are written.
+    brotli = None
+
+
+COMPRESSIBLE = {'.css', '.js', '.mjs', '.map', '.svg', '.json', '.txt', '.xml', '.html', '.ico', '.ttf', '.eot'}
+
+# Preferred first.
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+# Unhashed names can change in place on the next deploy.
+REVALIDATE = 'public, max-age=300'
+
+
+def compress(data):
+    """Compressed copies of ``data`` by file suffix, keeping only those that are worth it."""
+    copies = {'.gz': gzip.compress(data, compresslevel=9, mtime=0)}
+    if brotli is not None:
+        copies['.br'] = brotli.compress(data, quality=11)
+    return {suffix: body for suffix, body in copies.items() if len(body) < len(data) * 0.95}
+
+
+class CompressedManifestStaticFilesStorage(ManifestStaticFilesStorage):
+    min_compress_size = 256
+
+    def post_process(self, paths, dry_run=False, **options):
+        names = set()
+        for name, hashed_name, processed in super().post_process(paths, dry_run, **options):
+            yield name, hashed_name, processed
+            if not isinstance(processed, Exception):
+                names.update([name, hashed_name])
+        if dry_run:
+            return
+        for name in sorted(names):
+            if os.path.splitext(name)[1].lower() not in COMPRESSIBLE:
+                continue
+            with self.open(name) as source:
+                data = source.read()
+            if len(data) < self.min_compress_size:
+                continue
+            for suffix, body in compress(data).items():
+                with open(self.path(name + suffix), 'wb') as target:
+                    target.write(body)
+                yield name + suffix, name + suffix, True
+
+
+def accepted_encodings(header):
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        q = params.strip()
+        if q.startswith('q=') and q[2:].strip() in ('0', '0.0', '0.00', '0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+    return accepted
+
+
+class StaticFilesMiddleware:
+    """
+    Serve ``STATIC_URL`` from ``STATIC_ROOT`` ahead of the URLconf.
+
+    Files are looked up once per process and remembered, so restart workers
+    after ``collectstatic``. Paths that aren't collected files fall through
+    to the rest of the stack.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.prefix = settings.STATIC_URL if settings.STATIC_URL.startswith('/') else '/' + settings.STATIC_URL
+        self.root = os.path.realpath(settings.STATIC_ROOT)
+        self.hashed = set(getattr(staticfiles_storage, 'hashed_files', {}).values())
+        self.files = {}
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.serve(request) or self.get_response(request)
+
+    async def __acall__(self, request):
+        # Only stat() calls, and those once per file: not worth a thread hop.
+        return self.serve(request) or await self.get_response(request)
+
+    def serve(self, request):
+        if request.method not in ('GET', 'HEAD') or not request.path_info.startswith(self.prefix):
+            return None
+        name = request.path_info[len(self.prefix):]
+        entry = self.files.get(name)
+        if entry is None:
+            entry = self.find(name)
+            if entry is None:
+                return None
+            self.files[name] = entry
+
+        content_type, variants = entry
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        encoding, path, etag, mtime = next(
+            variant for variant in variants if variant[0] is None or variant[0] in accepted
+        )
+        if etag in parse_etags(request.headers.get('If-None-Match', '')):
+            response = HttpResponseNotModified()
+        else:
+            response = FileResponse(open(path, 'rb'), content_type=content_type)
+            response['Last-Modified'] = http_date(mtime)
+            if encoding:
+                response['Content-Encoding'] = encoding
+        response['ETag'] = etag
+        response['Cache-Control'] = IMMUTABLE if name in self.hashed else REVALIDATE
+        if len(variants) > 1:
+            patch_vary_headers(response, ['Accept-Encoding'])
+        return response
+
+    def find(self, name):
+        """``(content_type, variants)`` for a collected file, or None. Variants end with the identity one."""
+        path = os.path.realpath(os.path.join(self.root, *posixpath.normpath(name).split('/')))
+        if not path.startswith(self.root + os.sep) or not os.path.isfile(path):
+            return None
+        content_type, _ = mimetypes.guess_type(path)
+        content_type = content_type or 'application/octet-stream'
+        if content_type.startswith('text/') or content_type in ('application/javascript', 'application/json'):
+            content_type += '; charset=utf-8'
+        variants = []
+        for encoding, suffix in [*ENCODINGS, (None, '')]:
+            try:
+                stat = os.stat(path + suffix)
+            except FileNotFoundError:
+                continue
+            tag = f'"{int(stat.st_mtime):x}-{stat.st_size:x}{"-" + encoding if encoding else ""}"'
+            variants.append((encoding, path + suffix, tag, stat.st_mtime))
+        return content_type, variants
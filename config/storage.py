@@ -0,0 +1,72 @@
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage, storages
+from django.db import transaction
+from django.db.models import F
+
+
+CAS_PREFIX = 'cas'
+
+
+def media_storage():
+    """Storage callable for uploaded media fields; resolves the ``media`` alias in STORAGES."""
+    return storages['media']
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    for chunk in content.chunks():
+        digest.update(chunk if isinstance(chunk, bytes) else chunk.encode())
+    return digest.hexdigest()
+
+
+def is_content_addressed(name):
+    return bool(name) and name.startswith(f'{CAS_PREFIX}/')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """
+    Stores every file once, under the SHA-256 of its bytes.
+
+    ``save()`` takes a reference and ``delete()`` drops one; the bytes are
+    only unlinked when the last reference goes. Names outside ``cas/`` are
+    legacy uploads with no reference count and are never deleted here.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        # The final name is derived from the content in _save().
+        return name
+
+    def _save(self, name, content):
+        from users.models import MediaBlob
+
+        extension = os.path.splitext(name)[1].lower()
+        digest = content_hash(content)
+        name = f'{CAS_PREFIX}/{digest[:2]}/{digest[2:4]}/{digest}{extension}'
+
+        with transaction.atomic():
+            # Taking the reference first holds the write lock, so a concurrent
+            # delete of the same blob cannot unlink it underneath us.
+            blob, created = MediaBlob.objects.get_or_create(name=name, defaults={'size': content.size, 'refcount': 1})
+            if not created:
+                MediaBlob.objects.filter(pk=blob.pk).update(refcount=F('refcount') + 1)
+            if not super().exists(name):
+                super()._save(name, content)
+        return name
+
+    def delete(self, name):
+        from users.models import MediaBlob
+
+        if not is_content_addressed(name):
+            return
+        with transaction.atomic():
+            if not MediaBlob.objects.filter(name=name).update(refcount=F('refcount') - 1):
+                return
+            if MediaBlob.objects.filter(name=name, refcount__lte=0).delete()[0]:
+                super().delete(name)
+
+    def refcount(self, name):
+        from users.models import MediaBlob
+
+        return MediaBlob.objects.filter(name=name).values_list('refcount', flat=True).first() or 0
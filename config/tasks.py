@@ -0,0 +1,117 @@
+import functools
+import logging
+import os
+import socket
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F, Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+
+logger = logging.getLogger(__name__)
+
+
+class Task:
+    """
+    A function that can be called now or queued for ``manage.py run_tasks``.
+
+    Arguments must be JSON-serialisable: pass primary keys, not instances.
+    """
+
+    def __init__(self, func, max_attempts):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = f'{func.__module__}.{func.__qualname__}'
+        self.max_attempts = max_attempts
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def enqueue(self, *args, **kwargs):
+        """
+        Queue a call and return its BackgroundTask row.
+
+        With TASKS_EAGER the call runs inline instead and its return value is
+        returned. A row written inside a transaction only becomes visible to
+        workers if that transaction commits.
+        """
+        from users.models import BackgroundTask
+
+        if settings.TASKS_EAGER:
+            return self.func(*args, **kwargs)
+        return BackgroundTask.objects.create(
+            name=self.name, args=list(args), kwargs=kwargs, max_attempts=self.max_attempts,
+        )
+
+
+def task(func=None, *, max_attempts=3):
+    """Decorator registering a module-level function as a background task."""
+    if func is None:
+        return functools.partial(task, max_attempts=max_attempts)
+    return Task(func, max_attempts)
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=settings.TASKS_RETRY_DELAY * 2 ** (attempts - 1))
+
+
+def claim(worker, limit=10):
+    """
+    Lock up to ``limit`` due tasks for ``worker`` and return them.
+
+    Tasks left running by a worker that died are claimed again once they go
+    stale. The claiming UPDATE re-checks the status, so two workers racing for
+    the same row cannot both take it.
+    """
+    from users.models import BackgroundTask
+
+    now = timezone.now()
+    stale = now - timedelta(seconds=settings.TASKS_STALE_AFTER)
+    claimable = Q(status='pending', run_at__lte=now) | Q(status='running', started_at__lt=stale)
+    ids = list(BackgroundTask.objects.filter(claimable).values_list('id', flat=True)[:limit])
+    if not ids:
+        return []
+    BackgroundTask.objects.filter(claimable, id__in=ids).update(
+        status='running', locked_by=worker, started_at=now, attempts=F('attempts') + 1,
+    )
+    return list(BackgroundTask.objects.filter(id__in=ids, status='running', locked_by=worker, started_at=now))
+
+
+def execute(job):
+    """Run one claimed task; success deletes it, failure schedules a retry or gives up."""
+    try:
+        import_string(job.name)(*job.args, **job.kwargs)
+    except Exception:
+        logger.exception('Task %s (%s) failed on attempt %s', job.pk, job.name, job.attempts)
+        job.last_error = traceback.format_exc()
+        if job.attempts >= job.max_attempts:
+            job.status = 'failed'
+        else:
+            job.status = 'pending'
+            job.run_at = timezone.now() + retry_delay(job.attempts)
+        job.locked_by = ''
+        job.save(update_fields=['status', 'run_at', 'locked_by', 'last_error'])
+        return False
+    job.delete()
+    return True
+
+
+def run_pending(worker=None, limit=None, batch_size=10):
+    """Run due tasks until none are left (or ``limit`` ran); returns how many ran."""
+    worker = worker or worker_name()
+    ran = 0
+    while limit is None or ran < limit:
+        jobs = claim(worker, batch_size if limit is None else min(batch_size, limit - ran))
+        if not jobs:
+            break
+        for job in jobs:
+            execute(job)
+            ran += 1
+    return ran
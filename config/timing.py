@@ -0,0 +1,221 @@
+"""
+Per-request timing: SQL, template rendering and the view, reported in a
+``Server-Timing`` header and, for slow requests, in a JSONL log.
+
+The figures overlap rather than add up: ``view`` includes the queries and
+templates it triggered, and ``total`` covers the whole middleware stack.
+Time is attributed through a context variable, so queries run on helper
+threads (config.async_views.gather_queries) still count towards the request
+that started them.
+"""
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.template.backends.django import DjangoTemplates
+from django.utils import timezone
+
+
+MAX_LOGGED_QUERIES = 50
+
+_current = contextvars.ContextVar('request_timings', default=None)
+_slow_log = None
+_slow_log_lock = threading.Lock()
+
+
+class RequestTimings:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = []
+        self.query_count = 0
+        self.sql = 0.0
+        self.template = 0.0
+        self.rendering = False
+        self.view_started = None
+        self.view = 0.0
+
+    def add_query(self, sql, duration, origin):
+        with self.lock:
+            self.query_count += 1
+            self.sql += duration
+            if len(self.queries) < MAX_LOGGED_QUERIES:
+                self.queries.append({'sql': sql, 'ms': round(duration * 1000, 3), 'origin': origin})
+
+
+def query_origin():
+    """``path:line in function`` of the innermost project frame outside Django's machinery."""
+    root = str(settings.BASE_DIR) + os.sep
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if filename.startswith(root) and 'site-packages' not in filename and filename != __file__:
+            return f'{os.path.relpath(filename, root)}:{frame.f_lineno} in {frame.f_code.co_name}'
+        frame = frame.f_back
+    return None
+
+
+def record_query(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query(sql, time.perf_counter() - start, query_origin())
+
+
+def instrument(connection):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def instrument_new_connection(sender, connection, **kwargs):
+    instrument(connection)
+
+
+connection_created.connect(instrument_new_connection)
+
+
+class TimedTemplate:
+    """A backend template that adds its render time to the current request's."""
+
+    def __init__(self, template):
+        self.template = template
+
+    def __getattr__(self, name):
+        return getattr(self.template, name)
+
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        if timings is None or timings.rendering:
+            # Nested renders are already inside the outer one's time.
+            return self.template.render(context, request)
+        timings.rendering = True
+        start = time.perf_counter()
+        try:
+            return self.template.render(context, request)
+        finally:
+            timings.template += time.perf_counter() - start
+            timings.rendering = False
+
+
+class TimedDjangoTemplates(DjangoTemplates):
+    def from_string(self, template_code):
+        return TimedTemplate(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return TimedTemplate(super().get_template(template_name))
+
+
+def slow_log():
+    global _slow_log
+    with _slow_log_lock:
+        if _slow_log is None:
+            path = settings.SLOW_REQUEST_LOG
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            handler = logging.handlers.RotatingFileHandler(
+                path, maxBytes=settings.SLOW_REQUEST_LOG_MAX_BYTES,
+                backupCount=settings.SLOW_REQUEST_LOG_BACKUPS, encoding='utf-8',
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger = logging.getLogger('config.timing.slow')
+            logger.addHandler(handler)
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            _slow_log = logger
+    return _slow_log
+
+
+class ServerTimingMiddleware:
+    """
+    Outermost middleware: times the request and reports it.
+
+    ``process_view`` marks where the view starts, so ``view`` excludes URL
+    resolution and the request phase of the middleware above the view.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+            # A sync process_view would cost every async request a thread hop.
+            self.process_view = self.aprocess_view
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        # Connections opened before this module was imported missed connection_created.
+        for connection in connections.all(initialized_only=True):
+            instrument(connection)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - start)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, timings, time.perf_counter() - start)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        self.mark_view_start()
+
+    async def aprocess_view(self, request, view_func, view_args, view_kwargs):
+        self.mark_view_start()
+
+    def mark_view_start(self):
+        timings = _current.get()
+        if timings is not None:
+            timings.view_started = time.perf_counter()
+
+    def finish(self, request, response, timings, total):
+        if timings.view_started is not None:
+            timings.view = time.perf_counter() - timings.view_started
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timings.sql * 1000:.1f};desc="{timings.query_count} queries"',
+            f'tpl;dur={timings.template * 1000:.1f}',
+            f'view;dur={timings.view * 1000:.1f}',
+            f'total;dur={total * 1000:.1f}',
+        ])
+        if total * 1000 >= settings.SLOW_REQUEST_MS:
+            self.log_slow(request, response, timings, total)
+        return response
+
+    def log_slow(self, request, response, timings, total):
+        match = request.resolver_match
+        entry = {
+            'time': timezone.now().isoformat(),
+            'method': request.method,
+            'path': request.path,
+            'url_name': match.view_name if match else None,
+            'status': response.status_code,
+            'total_ms': round(total * 1000, 3),
+            'view_ms': round(timings.view * 1000, 3),
+            'sql_ms': round(timings.sql * 1000, 3),
+            'template_ms': round(timings.template * 1000, 3),
+            'queries': timings.query_count,
+            'sql': sorted(timings.queries, key=lambda query: query['ms'], reverse=True),
+        }
+        slow_log().info(json.dumps(entry))
@@ -3,13 +3,17 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from reports.views import serve_media
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('', include('users.urls')),
     path('reports/', include('reports.urls')),
     path('events/', include('events.urls')),
+    path('api/', include('config.api_urls')),
+    # Uploads always go through the view, which checks who may see them.
+    path(settings.MEDIA_URL.lstrip('/') + '<path:name>', serve_media, name='media'),
 ]
 
 if settings.DEBUG:
-    urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
     urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
@@ -0,0 +1,33 @@
+from django.urls import reverse
+from django.utils import timezone
+
+from config.api import api_view, file_url, json_page
+from .models import Event
+
+
+EVENT_FIELDS = {
+    'id': lambda e: e.pk,
+    'title': lambda e: e.title,
+    'description': lambda e: e.description,
+    'location': lambda e: e.location,
+    'event_date': lambda e: e.event_date,
+    'event_time': lambda e: e.event_time,
+    'duration': lambda e: e.duration,
+    'photo': lambda e: file_url(e.photo),
+    'created_by': lambda e: e.created_by.username,
+    'created_at': lambda e: e.created_at,
+    'updated_at': lambda e: e.updated_at,
+    'attendee_count': lambda e: e.attendee_count,
+    'url': lambda e: reverse('events:event_detail', args=[e.pk]),
+}
+
+
+@api_view
+def event_list(request):
+    events = Event.objects.select_related('created_by')
+    filter_type = request.GET.get('filter', 'all')
+    if filter_type == 'upcoming':
+        events = events.filter(event_date__gte=timezone.now().date())
+    elif filter_type == 'past':
+        events = events.filter(event_date__lt=timezone.now().date())
+    return json_page(request, events, EVENT_FIELDS, lambda e: (e.updated_at, e.attendee_count))
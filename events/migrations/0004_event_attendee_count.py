@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 11:06
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_attendee_count(apps, schema_editor):
+    Event = apps.get_model('events', 'Event')
+    EventAttendee = apps.get_model('events', 'EventAttendee')
+    counts = (
+        EventAttendee.objects.filter(event=OuterRef('pk'))
+        .order_by().values('event').annotate(n=Count('*')).values('n')
+    )
+    Event.objects.update(attendee_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0003_event_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='attendee_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_attendee_count, migrations.RunPython.noop),
+    ]
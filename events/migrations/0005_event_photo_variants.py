@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0004_event_attendee_count'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='event',
+            name='photo_variants',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
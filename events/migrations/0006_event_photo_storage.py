@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 14:02
+
+import config.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('events', '0005_event_photo_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='event',
+            name='photo',
+            field=models.ImageField(blank=True, null=True, storage=config.storage.media_storage, upload_to='events/photos/'),
+        ),
+    ]
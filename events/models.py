@@ -1,7 +1,9 @@
-from django.db import models
+from django.db import models, transaction, IntegrityError
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
+from config.storage import media_storage
+
 User = get_user_model()
 
 class Event(models.Model):
@@ -11,14 +13,21 @@ class Event(models.Model):
     event_date = models.DateField(blank=True, null=True)
     event_time = models.TimeField(blank=True, null=True)
     duration = models.CharField(max_length=100, blank=True, null=True)
-    photo = models.ImageField(upload_to='events/photos/', blank=True, null=True)
+    photo = models.ImageField(upload_to='events/photos/', storage=media_storage, blank=True, null=True)
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='events')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     is_active = models.BooleanField(default=True)
+    attendee_count = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='event_recent_idx'),
+            models.Index(fields=['event_date', '-created_at', '-id'], name='event_date_recent_idx'),
+            models.Index(fields=['created_by', '-created_at'], name='event_owner_recent_idx'),
+        ]
     
     def __str__(self):
         return self.title
@@ -27,6 +36,23 @@ class Event(models.Model):
         if self.event_date:
             return self.event_date < timezone.now().date()
         return False
+    
+    def add_attendee(self, user):
+        """Join the event; returns False if the user was already attending."""
+        try:
+            with transaction.atomic():
+                EventAttendee.objects.create(event=self, user=user)
+                Event.objects.filter(pk=self.pk).update(attendee_count=models.F('attendee_count') + 1)
+        except IntegrityError:
+            return False
+        return True
+    
+    def remove_attendee(self, user):
+        with transaction.atomic():
+            deleted, _ = EventAttendee.objects.filter(event=self, user=user).delete()
+            if deleted:
+                Event.objects.filter(pk=self.pk).update(attendee_count=models.F('attendee_count') - deleted)
+        return bool(deleted)
 
 
 class EventAttendee(models.Model):
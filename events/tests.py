@@ -1,3 +1,114 @@
-from django.test import TestCase
+import threading
+from io import StringIO
+from datetime import timedelta
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from config.pagination import PAGE_SIZE
+from users.models import CustomUser
+from .models import Event, EventAttendee
+
+
+class EventListPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+        today = timezone.now().date()
+        for i in range(PAGE_SIZE + 3):
+            Event.objects.create(title=f'Cleanup {i}', description='x', event_date=today + timedelta(days=1), created_by=cls.user)
+        Event.objects.create(title='Old cleanup', description='x', event_date=today - timedelta(days=1), created_by=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_upcoming_filter_paginates(self):
+        url = reverse('events:event_list')
+        first = self.client.get(url, {'filter': 'upcoming'})
+        self.assertEqual(len(first.context['events']), PAGE_SIZE)
+        self.assertIn('filter=upcoming', first.context['next_query'])
+
+        second = self.client.get(f"{url}?{first.context['next_query']}")
+        self.assertEqual(len(second.context['events']), 3)
+        self.assertNotContains(second, 'Old cleanup')
+
+    def test_past_filter(self):
+        response = self.client.get(reverse('events:event_list'), {'filter': 'past'})
+        self.assertEqual([e.title for e in response.context['events']], ['Old cleanup'])
+
+
+class EventApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+        cls.event = Event.objects.create(title='Cleanup', description='x', created_by=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_attendee_changes_invalidate_etag(self):
+        url = reverse('api:event_list')
+        first = self.client.get(url, {'fields': 'title,attendee_count'})
+        self.assertEqual(first.json()['results'], [{'title': 'Cleanup', 'attendee_count': 0}])
+        self.assertEqual(self.client.get(url, {'fields': 'title,attendee_count'}, HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+
+        self.event.add_attendee(self.user)
+        second = self.client.get(url, {'fields': 'title,attendee_count'}, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.json()['results'][0]['attendee_count'], 1)
+
+
+class AttendeeCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+        cls.event = Event.objects.create(title='Cleanup', description='x', created_by=cls.user)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_join_and_leave_update_counter(self):
+        url = reverse('events:event_detail', args=[self.event.pk])
+        self.client.post(url, {'join': ''})
+        self.client.post(url, {'join': ''})
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.attendee_count, 1)
+
+        self.client.post(url, {'leave': ''})
+        self.client.post(url, {'leave': ''})
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.attendee_count, 0)
+
+    def test_rebuild_counters_repairs_drift(self):
+        EventAttendee.objects.create(event=self.event, user=self.user)
+        call_command('rebuild_counters', stdout=StringIO())
+        self.event.refresh_from_db()
+        self.assertEqual(self.event.attendee_count, 1)
+
+
+class ConcurrentJoinTests(TransactionTestCase):
+    def test_counter_matches_rows_under_concurrent_joins(self):
+        owner = CustomUser.objects.create(username='owner', is_approved=True)
+        event = Event.objects.create(title='Cleanup', description='x', created_by=owner)
+        users = [CustomUser.objects.create(username=f'joiner{i}', is_approved=True) for i in range(8)]
+        barrier = threading.Barrier(len(users) * 2)
+
+        def join(user):
+            try:
+                barrier.wait()
+                # Each user races twice; only one of the two may count.
+                Event.objects.get(pk=event.pk).add_attendee(user)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=join, args=(u,)) for u in users for _ in range(2)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        event.refresh_from_db()
+        self.assertEqual(EventAttendee.objects.filter(event=event).count(), len(users))
+        self.assertEqual(event.attendee_count, len(users))
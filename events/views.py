@@ -4,6 +4,7 @@ from django.contrib import messages
 from django.views.decorators.http import require_http_methods
 from .models import Event, EventAttendee
 from django.utils import timezone
+from config.pagination import paginate_by_cursor, cursor_querystring
 
 @login_required(login_url='users:login')
 def event_list(request):
@@ -11,7 +12,7 @@ def event_list(request):
         messages.warning(request, 'Your account is pending approval.')
         return redirect('users:pending')
     
-    events = Event.objects.all().order_by('-created_at')
+    events = Event.objects.select_related('created_by')
     filter_type = request.GET.get('filter', 'upcoming')
     
     if filter_type == 'upcoming':
@@ -19,9 +20,14 @@ def event_list(request):
     elif filter_type == 'past':
         events = events.filter(event_date__lt=timezone.now().date())
     
+    page = paginate_by_cursor(events, request.GET.get('cursor'))
+    
     context = {
-        'events': events,
+        'events': page,
+        'page': page,
         'filter_type': filter_type,
+        'next_query': cursor_querystring(request, page.next_cursor) if page.has_next else '',
+        'prev_query': cursor_querystring(request, page.prev_cursor) if page.has_previous else '',
     }
     return render(request, 'events/event_list.html', context)
 
@@ -69,29 +75,29 @@ def event_detail(request, pk):
     if not request.user.is_approved:
         return redirect('users:pending')
     
-    event = get_object_or_404(Event, pk=pk)
-    attendees = event.attendees.all()
-    is_attending = EventAttendee.objects.filter(event=event, user=request.user).exists()
+    event = get_object_or_404(Event.objects.select_related('created_by'), pk=pk)
     
     if request.method == 'POST':
         if 'join' in request.POST:
-            if not is_attending:
-                EventAttendee.objects.create(event=event, user=request.user)
+            if event.add_attendee(request.user):
                 messages.success(request, 'You have joined the event!')
             else:
                 messages.info(request, 'You are already attending this event.')
             return redirect('events:event_detail', pk=event.id)
         
         elif 'leave' in request.POST:
-            EventAttendee.objects.filter(event=event, user=request.user).delete()
+            event.remove_attendee(request.user)
             messages.success(request, 'You have left the event!')
             return redirect('events:event_detail', pk=event.id)
     
+    attendees = list(event.attendees.select_related('user'))
+    is_attending = any(attendee.user_id == request.user.id for attendee in attendees)
+    
     context = {
         'event': event,
         'attendees': attendees,
         'is_attending': is_attending,
-        'attendee_count': attendees.count(),
+        'attendee_count': event.attendee_count,
     }
     return render(request, 'events/event_detail.html', context)
 
@@ -103,7 +109,7 @@ def delete_event(request, pk):
     
     event = get_object_or_404(Event, pk=pk)
     
-    if event.created_by != request.user and not request.user.is_community_admin():
+    if event.created_by_id != request.user.id and not request.user.is_community_admin():
         messages.error(request, 'You do not have permission to delete this event.')
         return redirect('events:event_list')
     
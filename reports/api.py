@@ -0,0 +1,47 @@
+from django.shortcuts import get_object_or_404
+from django.urls import reverse
+
+from config.api import api_view, file_url, json_page
+from .models import Report
+
+
+REPORT_FIELDS = {
+    'id': lambda r: r.pk,
+    'title': lambda r: r.title,
+    'description': lambda r: r.description,
+    'report_type': lambda r: r.report_type,
+    'status': lambda r: r.status,
+    'location': lambda r: r.location,
+    'photo': lambda r: file_url(r.photo),
+    'created_by': lambda r: r.created_by.username,
+    'created_at': lambda r: r.created_at,
+    'updated_at': lambda r: r.updated_at,
+    'resolved_at': lambda r: r.resolved_at,
+    'comment_count': lambda r: r.comment_count,
+    'url': lambda r: reverse('reports:report_detail', args=[r.pk]),
+}
+
+COMMENT_FIELDS = {
+    'id': lambda c: c.pk,
+    'report': lambda c: c.report_id,
+    'user': lambda c: c.user.username,
+    'content': lambda c: c.content,
+    'created_at': lambda c: c.created_at,
+}
+
+
+@api_view
+def report_list(request):
+    reports = Report.objects.visible_to(request.user).select_related('created_by')
+    if request.GET.get('status'):
+        reports = reports.filter(status=request.GET['status'])
+    # comment_count moves with F() updates that leave updated_at alone.
+    return json_page(request, reports, REPORT_FIELDS, lambda r: (r.updated_at, r.comment_count))
+
+
+@api_view
+def comment_list(request, pk):
+    report = get_object_or_404(Report.objects.visible_to(request.user), pk=pk)
+    comments = report.comments.select_related('user')
+    # Comments cannot be edited, so creation time is their version.
+    return json_page(request, comments, COMMENT_FIELDS, lambda c: (c.created_at,))
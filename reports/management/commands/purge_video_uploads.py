@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from reports.models import VideoUpload
+
+
+class Command(BaseCommand):
+    help = 'Delete unfinished chunked video uploads that have not received data recently.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=int, default=24, help='Idle time before an upload is abandoned.')
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options['hours'])
+        stale = VideoUpload.objects.filter(completed_at__isnull=True, updated_at__lt=cutoff)
+        count = 0
+        for upload in stale.iterator():
+            upload.discard()
+            count += 1
+        self.stdout.write(self.style.SUCCESS(f'Removed {count} abandoned upload(s).'))
@@ -0,0 +1,73 @@
+from django.db import transaction
+
+from config.images import variant_names
+from events.models import Event
+from users.models import CustomUser
+from .models import MediaReference, Report
+
+
+# File fields whose uploads serve_media may hand out, per model.
+MEDIA_FIELDS = {
+    Report: ['photo', 'video'],
+    Event: ['photo'],
+    CustomUser: ['profile_picture'],
+}
+
+# Fields that change which files a row uses or who may see them.
+REFERENCE_FIELDS = {
+    Report: {'photo', 'photo_variants', 'video', 'report_type', 'created_by'},
+    Event: {'photo', 'photo_variants'},
+    CustomUser: {'profile_picture', 'profile_picture_variants'},
+}
+
+
+def media_names(instance):
+    """Every file ``instance`` points at, stored image variants included."""
+    names = set()
+    for field_name in MEDIA_FIELDS[type(instance)]:
+        field_file = getattr(instance, field_name)
+        if field_file:
+            names.add(field_file.name)
+        names.update(variant_names(getattr(instance, f'{field_name}_variants', None)))
+    return names
+
+
+def private_owner(instance):
+    """The one member besides admins who may see ``instance``'s files; None when everyone may."""
+    if isinstance(instance, Report) and instance.report_type != 'community':
+        return instance.created_by_id
+    return None
+
+
+def sync_media_references(instance):
+    """Rewrite ``instance``'s MediaReference rows if its files or visibility changed."""
+    label = instance._meta.label_lower
+    references = MediaReference.objects.filter(model=label, object_id=instance.pk)
+    owner = private_owner(instance)
+    wanted = {(name, owner) for name in media_names(instance)}
+    if set(references.values_list('name', 'owner_id')) == wanted:
+        return
+    with transaction.atomic():
+        references.delete()
+        MediaReference.objects.bulk_create(
+            MediaReference(name=name, model=label, object_id=instance.pk, owner_id=owner) for name, owner in wanted
+        )
+
+
+def forget_media_references(instance):
+    MediaReference.objects.filter(model=instance._meta.label_lower, object_id=instance.pk).delete()
+
+
+def can_view_media(user, name):
+    """
+    The rule of ``report_detail``: approved members, with home reports' files
+    for their owner and admins. Files no row uses (orphans, partial chunked
+    uploads) are served to nobody.
+    """
+    if not user.is_authenticated or not user.is_approved:
+        return False
+    owners = set(MediaReference.objects.filter(name=name).values_list('owner_id', flat=True))
+    if not owners:
+        return False
+    # Uploads are stored once per content, so the same file may also be public elsewhere.
+    return user.is_community_admin() or None in owners or user.pk in owners
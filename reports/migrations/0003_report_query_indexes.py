@@ -0,0 +1,39 @@
+# Generated by Django 6.0 on 2026-10-18 10:12
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0002_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['-created_at', '-id'], name='report_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['status', '-created_at', '-id'], name='report_status_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(fields=['created_by', '-created_at'], name='report_owner_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(condition=models.Q(('report_type', 'community')), fields=['-created_at', '-id'], name='report_community_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='report',
+            index=models.Index(condition=models.Q(('report_type', 'community')), fields=['status', '-created_at', '-id'], name='report_community_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='reportcomment',
+            index=models.Index(fields=['report', 'created_at'], name='comment_thread_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 6.0 on 2026-10-18 11:06
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_comment_count(apps, schema_editor):
+    Report = apps.get_model('reports', 'Report')
+    ReportComment = apps.get_model('reports', 'ReportComment')
+    counts = (
+        ReportComment.objects.filter(report=OuterRef('pk'))
+        .order_by().values('report').annotate(n=Count('*')).values('n')
+    )
+    Report.objects.update(comment_count=Coalesce(Subquery(counts), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0003_report_query_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='report',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_comment_count, migrations.RunPython.noop),
+    ]
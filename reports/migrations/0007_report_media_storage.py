@@ -0,0 +1,24 @@
+# Generated by Django 6.0 on 2026-10-18 14:02
+
+import config.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0006_videoupload'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='report',
+            name='photo',
+            field=models.ImageField(blank=True, null=True, storage=config.storage.media_storage, upload_to='reports/photos/'),
+        ),
+        migrations.AlterField(
+            model_name='report',
+            name='video',
+            field=models.FileField(blank=True, null=True, storage=config.storage.media_storage, upload_to='reports/videos/'),
+        ),
+    ]
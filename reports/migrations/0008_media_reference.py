@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:27
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+MEDIA_FIELDS = [
+    ('reports', 'Report', ['photo', 'video']),
+    ('events', 'Event', ['photo']),
+    ('users', 'CustomUser', ['profile_picture']),
+]
+
+
+def populate_media_references(apps, schema_editor):
+    MediaReference = apps.get_model('reports', 'MediaReference')
+    for app_label, model_name, fields in MEDIA_FIELDS:
+        model = apps.get_model(app_label, model_name)
+        label = f'{app_label}.{model_name.lower()}'
+        rows = []
+        for instance in model.objects.iterator():
+            owner = None
+            if model_name == 'Report' and instance.report_type != 'community':
+                owner = instance.created_by_id
+            names = set()
+            for field_name in fields:
+                if getattr(instance, field_name):
+                    names.add(getattr(instance, field_name).name)
+                variants = getattr(instance, f'{field_name}_variants', None) or {}
+                names.update(
+                    name for fmt, widths in variants.items() if isinstance(widths, dict) for name in widths.values()
+                )
+            rows.extend(
+                MediaReference(name=name, model=label, object_id=instance.pk, owner_id=owner) for name in names
+            )
+        MediaReference.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('reports', '0007_report_media_storage'),
+        ('events', '0006_event_photo_storage'),
+        ('users', '0007_backgroundtask'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaReference',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255)),
+                ('model', models.CharField(max_length=100)),
+                ('object_id', models.PositiveBigIntegerField()),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['name'], name='media_ref_name_idx'), models.Index(fields=['model', 'object_id'], name='media_ref_object_idx')],
+            },
+        ),
+        migrations.RunPython(populate_media_references, migrations.RunPython.noop),
+    ]
@@ -1,9 +1,27 @@
-from django.db import models
+import os
+import shutil
+import tempfile
+import uuid
+
+from django.conf import settings
+from django.core.files import File
+from django.db import models, transaction
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 
+from config.storage import media_storage
+
 User = get_user_model()
 
+
+class ReportQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """Community reports plus the user's own home reports; admins see everything."""
+        if user.is_community_admin():
+            return self
+        return self.filter(models.Q(report_type='community') | models.Q(created_by=user))
+
+
 class Report(models.Model):
     REPORT_TYPE_CHOICES = (
         ('home', 'Home (Private)'),
@@ -21,16 +39,35 @@ class Report(models.Model):
     report_type = models.CharField(max_length=10, choices=REPORT_TYPE_CHOICES, default='community')
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     location = models.CharField(max_length=255, blank=True, null=True)
-    photo = models.ImageField(upload_to='reports/photos/', blank=True, null=True)
-    video = models.FileField(upload_to='reports/videos/', blank=True, null=True)
+    photo = models.ImageField(upload_to='reports/photos/', storage=media_storage, blank=True, null=True)
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False)
+    video = models.FileField(upload_to='reports/videos/', storage=media_storage, blank=True, null=True)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, related_name='reports')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     resolved_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name='resolved_reports')
     resolved_at = models.DateTimeField(null=True, blank=True)
+    comment_count = models.PositiveIntegerField(default=0, editable=False)
+    
+    objects = ReportQuerySet.as_manager()
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at', '-id'], name='report_recent_idx'),
+            models.Index(fields=['status', '-created_at', '-id'], name='report_status_recent_idx'),
+            models.Index(fields=['created_by', '-created_at'], name='report_owner_recent_idx'),
+            models.Index(
+                fields=['-created_at', '-id'],
+                condition=models.Q(report_type='community'),
+                name='report_community_recent_idx',
+            ),
+            models.Index(
+                fields=['status', '-created_at', '-id'],
+                condition=models.Q(report_type='community'),
+                name='report_community_status_idx',
+            ),
+        ]
     
     def __str__(self):
         return self.title
@@ -40,6 +77,12 @@ class Report(models.Model):
         self.resolved_by = admin_user
         self.resolved_at = timezone.now()
         self.save()
+    
+    def add_comment(self, user, content):
+        with transaction.atomic():
+            comment = ReportComment.objects.create(report=self, user=user, content=content)
+            Report.objects.filter(pk=self.pk).update(comment_count=models.F('comment_count') + 1)
+        return comment
 
 
 class ReportComment(models.Model):
@@ -50,6 +93,130 @@ class ReportComment(models.Model):
     
     class Meta:
         ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['report', 'created_at'], name='comment_thread_idx'),
+        ]
     
     def __str__(self):
         return f"Comment by {self.user} on {self.report}"
+
+
+class PartialFile(File):
+    """A finished chunk file that storage can move into place instead of copying."""
+
+    def temporary_file_path(self):
+        return self.file.name
+
+
+class VideoUpload(models.Model):
+    """A resumable, chunked upload that becomes ``Report.video`` once complete."""
+
+    CHUNK_READ_SIZE = 64 * 1024
+
+    class OffsetConflict(Exception):
+        """Another request already appended at this offset."""
+
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    report = models.ForeignKey(Report, on_delete=models.CASCADE, related_name='video_uploads')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='video_uploads')
+    filename = models.CharField(max_length=255)
+    content_type = models.CharField(max_length=100)
+    total_size = models.PositiveBigIntegerField()
+    received_bytes = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.filename} ({self.received_bytes}/{self.total_size})"
+
+    @property
+    def part_path(self):
+        return os.path.join(settings.MEDIA_ROOT, 'uploads', 'partial', f'{self.id}.part')
+
+    @property
+    def is_complete(self):
+        return self.completed_at is not None
+
+    def append(self, stream, offset, length):
+        """
+        Add ``length`` bytes from ``stream`` to the part file at ``offset``.
+
+        The chunk is spooled to its own file first and only copied in once
+        this request has moved ``received_bytes`` past it with a conditional
+        UPDATE, so of two requests for the same offset exactly one appends;
+        the other raises OffsetConflict. Returns False if the client went
+        away mid-chunk.
+        """
+        directory = os.path.dirname(self.part_path)
+        os.makedirs(directory, exist_ok=True)
+        fd, chunk_path = tempfile.mkstemp(dir=directory, prefix=f'{self.id}.', suffix='.chunk')
+        try:
+            with os.fdopen(fd, 'w+b') as chunk:
+                written = 0
+                while written < length:
+                    data = stream.read(min(self.CHUNK_READ_SIZE, length - written))
+                    if not data:
+                        break
+                    chunk.write(data)
+                    written += len(data)
+                if written != length:
+                    return False
+                chunk.seek(0)
+                with transaction.atomic():
+                    claimed = VideoUpload.objects.filter(pk=self.pk, received_bytes=offset).update(
+                        received_bytes=offset + length, updated_at=timezone.now(),
+                    )
+                    if not claimed:
+                        raise self.OffsetConflict
+                    with open(self.part_path, 'ab') as part:
+                        # Drop anything a failed earlier copy left past the offset.
+                        part.truncate(offset)
+                        shutil.copyfileobj(chunk, part, self.CHUNK_READ_SIZE)
+        finally:
+            os.remove(chunk_path)
+        self.received_bytes = offset + length
+        return True
+
+    def read_head(self, size):
+        with open(self.part_path, 'rb') as part:
+            return part.read(size)
+
+    def finish(self):
+        with transaction.atomic():
+            with open(self.part_path, 'rb') as part:
+                self.report.video.save(self.filename, PartialFile(part, name=self.part_path), save=True)
+            # Storage moves the part file into place unless the same bytes were already stored.
+            if os.path.exists(self.part_path):
+                os.remove(self.part_path)
+            self.completed_at = timezone.now()
+            self.save(update_fields=['completed_at', 'updated_at'])
+
+    def discard(self):
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
+        self.delete()
+
+
+class MediaReference(models.Model):
+    """
+    One row's use of one media file, so ``serve_media`` can check access with
+    an indexed lookup. ``owner`` is set when only that user (and admins) may
+    see the row. Kept in step by reports.media.sync_media_references.
+    """
+    name = models.CharField(max_length=255)
+    model = models.CharField(max_length=100)
+    object_id = models.PositiveBigIntegerField()
+    owner = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['name'], name='media_ref_name_idx'),
+            models.Index(fields=['model', 'object_id'], name='media_ref_object_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.model} #{self.object_id})"
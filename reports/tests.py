@@ -1,3 +1,527 @@
-from django.test import TestCase
+import asyncio
+import base64
+import importlib
+import os
+import shutil
+import sys
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import clear_url_caches, reverse
+from django.utils import timezone
+from PIL import Image
+
+from config.live import broker, event_stream
+from config.pagination import PAGE_SIZE
+from users.models import CustomUser
+from .models import Report, VideoUpload
+
+
+class ReportListPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+        cls.other = CustomUser.objects.create_user(username='other', password='pass12345', is_approved=True)
+        for i in range(PAGE_SIZE * 2 + 5):
+            Report.objects.create(
+                title=f'Report {i}',
+                description='Overflowing bins',
+                status='resolved' if i % 2 else 'pending',
+                created_by=cls.user,
+            )
+        Report.objects.create(title='Private', description='x', report_type='home', created_by=cls.other)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_walks_forward_and_back(self):
+        url = reverse('reports:report_list')
+        first = self.client.get(url)
+        self.assertEqual(len(first.context['reports']), PAGE_SIZE)
+        self.assertFalse(first.context['page'].has_previous)
+
+        second = self.client.get(f"{url}?{first.context['next_query']}")
+        self.assertTrue(second.context['page'].has_previous)
+        seen = {r.pk for r in first.context['reports']} | {r.pk for r in second.context['reports']}
+        self.assertEqual(len(seen), PAGE_SIZE * 2)
+
+        third = self.client.get(f"{url}?{second.context['next_query']}")
+        self.assertEqual(len(third.context['reports']), 5)
+        self.assertFalse(third.context['page'].has_next)
+
+        back = self.client.get(f"{url}?{second.context['prev_query']}")
+        self.assertEqual(
+            [r.pk for r in back.context['reports']],
+            [r.pk for r in first.context['reports']],
+        )
+        self.assertFalse(back.context['page'].has_previous)
+
+    def test_status_filter_survives_paging(self):
+        url = reverse('reports:report_list')
+        first = self.client.get(url, {'status': 'pending'})
+        self.assertIn('status=pending', first.context['next_query'])
+        second = self.client.get(f"{url}?{first.context['next_query']}")
+        self.assertTrue(all(r.status == 'pending' for r in second.context['reports']))
+
+    def test_other_users_home_reports_hidden(self):
+        response = self.client.get(reverse('reports:report_list'))
+        self.assertNotContains(response, 'Private')
+
+    def test_garbled_cursor_falls_back_to_first_page(self):
+        response = self.client.get(reverse('reports:report_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['page'].has_previous)
+
+    def test_out_of_range_cursor_falls_back_to_first_page(self):
+        raw = f'next|{timezone.now().isoformat()}|{2 ** 64}'
+        cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+        response = self.client.get(reverse('reports:report_list'), {'cursor': cursor})
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.context['page'].has_previous)
+
+
+class CommentCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+        cls.report = Report.objects.create(title='Bins', description='x', created_by=cls.user)
+
+    def test_posting_comment_increments_counter(self):
+        self.client.force_login(self.user)
+        url = reverse('reports:report_detail', args=[self.report.pk])
+        self.client.post(url, {'comment': 'Still there'})
+        self.client.post(url, {'comment': 'Gone now'})
+        self.report.refresh_from_db()
+        self.assertEqual(self.report.comment_count, 2)
+        self.assertContains(self.client.get(url), 'Comments (<span data-comment-count>2</span>)')
+
+
+def png_upload(width=1600, height=900, name='bins.png'):
+    image = Image.new('RGBA', (width, height), (20, 160, 80, 255))
+    exif = Image.Exif()
+    exif[0x010F] = 'PhoneMaker'
+    buffer = BytesIO()
+    image.save(buffer, 'PNG', exif=exif)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type='image/png')
+
+
+class ImageVariantTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_login(self.user)
+
+    def test_upload_records_stripped_variants(self):
+        self.client.post(reverse('reports:create_report'), {
+            'title': 'Bins', 'description': 'x', 'report_type': 'community', 'photo': png_upload(),
+        })
+        report = Report.objects.get()
+        variants = report.photo_variants
+        self.assertEqual(variants['source'], report.photo.name)
+        self.assertEqual(sorted(variants['webp'], key=int), ['320', '640', '1280'])
+
+        with report.photo.storage.open(variants['jpeg']['640']) as f:
+            jpeg = Image.open(f)
+            self.assertEqual(jpeg.format, 'JPEG')
+            self.assertEqual(jpeg.size, (640, 360))
+            self.assertFalse(jpeg.getexif())
+        with report.photo.storage.open(variants['webp']['320']) as f:
+            self.assertEqual(Image.open(f).format, 'WEBP')
+
+        response = self.client.get(reverse('reports:report_detail', args=[report.pk]))
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, '640w')
+
+    def test_small_images_are_not_upscaled(self):
+        report = Report.objects.create(title='Bins', description='x', created_by=self.user, photo=png_upload(200, 100))
+        self.assertEqual(list(report.photo_variants['jpeg']), ['200'])
+
+    def test_backfill_command_fills_missing_variants(self):
+        report = Report.objects.create(title='Bins', description='x', created_by=self.user, photo=png_upload(500, 250))
+        Report.objects.filter(pk=report.pk).update(photo_variants={})
+        call_command('generate_image_variants', stdout=StringIO(), stderr=StringIO())
+        report.refresh_from_db()
+        self.assertEqual(sorted(report.photo_variants['webp'], key=int), ['320', '500'])
+
+
+MP4_HEAD = b'\x00\x00\x00\x18ftypmp42'
+
+
+@override_settings(REPORT_VIDEO_CHUNK_SIZE=1024, REPORT_VIDEO_MAX_SIZE=10 * 1024)
+class ChunkedVideoUploadTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+        cls.report = Report.objects.create(title='Dumping', description='x', created_by=cls.user)
+
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.client.force_login(self.user)
+
+    def start(self, size, filename='clip.mp4', content_type='video/mp4'):
+        return self.client.post(
+            reverse('reports:start_video_upload', args=[self.report.pk]),
+            {'filename': filename, 'size': size, 'content_type': content_type},
+        )
+
+    def put(self, state, data, offset):
+        return self.client.put(
+            state['upload_url'], data=data, content_type='application/octet-stream',
+            headers={'Upload-Offset': str(offset)},
+        )
+
+    def test_chunks_resume_and_attach(self):
+        payload = MP4_HEAD + b'v' * 2500
+        state = self.start(len(payload)).json()
+        self.assertEqual(state['offset'], 0)
+
+        self.assertEqual(self.put(state, payload[:1024], 0).json()['offset'], 1024)
+        # A retried chunk the server already has is refused with the real offset.
+        conflict = self.put(state, payload[:1024], 0)
+        self.assertEqual(conflict.status_code, 409)
+        self.assertEqual(conflict.json()['offset'], 1024)
+
+        resumed = self.client.get(state['upload_url']).json()
+        self.put(state, payload[1024:2048], resumed['offset'])
+        done = self.put(state, payload[2048:], 2048).json()
+        self.assertTrue(done['complete'])
+
+        self.report.refresh_from_db()
+        with self.report.video.open('rb') as f:
+            self.assertEqual(f.read(), payload)
+        self.assertFalse(os.path.exists(VideoUpload.objects.get().part_path))
+
+    def test_limits_are_checked_before_any_data(self):
+        self.assertEqual(self.start(20 * 1024).status_code, 413)
+        self.assertEqual(self.start(100, filename='clip.exe', content_type='application/x-msdownload').status_code, 415)
+
+        state = self.start(4096).json()
+        self.assertEqual(self.put(state, b'x' * 2048, 0).status_code, 413)
+
+    def test_content_must_match_declared_type(self):
+        state = self.start(1024).json()
+        response = self.put(state, b'MZ' + b'\x00' * 1022, 0)
+        self.assertEqual(response.status_code, 415)
+        self.assertFalse(VideoUpload.objects.exists())
+
+    def test_racing_chunks_for_one_offset_append_once(self):
+        payload = MP4_HEAD + b'v' * 1000
+        state = self.start(len(payload)).json()
+        append = VideoUpload.append
+        raced = {}
+
+        def race(upload, stream, offset, length):
+            if not raced:
+                # A retry of the same chunk lands while this request is still reading.
+                raced['response'] = None
+                raced['response'] = self.put(state, payload, 0)
+            return append(upload, stream, offset, length)
+
+        with mock.patch.object(VideoUpload, 'append', race):
+            response = self.put(state, payload, 0)
+        self.assertEqual(raced['response'].status_code, 200)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], len(payload))
+
+        self.report.refresh_from_db()
+        with self.report.video.open('rb') as f:
+            self.assertEqual(f.read(), payload)
+
+    def test_only_owner_may_upload(self):
+        state = self.start(1024).json()
+        stranger = CustomUser.objects.create_user(username='stranger', password='pass12345', is_approved=True)
+        self.client.force_login(stranger)
+        self.assertEqual(self.put(state, MP4_HEAD, 0).status_code, 404)
+
+
+
+class MediaServingTests(TestCase):
+    payload = MP4_HEAD + bytes(range(256)) * 8
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.owner = CustomUser.objects.create_user(username='owner', password='pass12345', is_approved=True)
+        cls.other = CustomUser.objects.create_user(username='other', password='pass12345', is_approved=True)
+        cls.admin = CustomUser.objects.create_user(username='head', password='pass12345', role='admin', is_approved=True)
+
+    def setUp(self):
+        cache.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.report = Report.objects.create(title='Leak', description='x', report_type='home', created_by=self.owner)
+        self.report.video.save('clip.mp4', ContentFile(self.payload))
+        self.url = self.report.video.url
+
+    def get(self, user, **headers):
+        self.client.force_login(user)
+        return self.client.get(self.url, headers=headers)
+
+    def body(self, response):
+        return b''.join(response.streaming_content)
+
+    def test_home_report_media_follows_report_visibility(self):
+        self.assertEqual(self.get(self.other).status_code, 404)
+        for user in (self.owner, self.admin):
+            response = self.get(user)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(self.body(response), self.payload)
+            self.assertEqual(response['Accept-Ranges'], 'bytes')
+            self.assertIn('private', response['Cache-Control'])
+        self.client.logout()
+        self.assertEqual(self.client.get(self.url).status_code, 404)
+
+        # Making the report public is picked up on the next request.
+        self.report.report_type = 'community'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.save()
+        self.assertEqual(self.get(self.other).status_code, 200)
+
+    def test_ranges(self):
+        response = self.get(self.owner, Range='bytes=10-19')
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response['Content-Range'], f'bytes 10-19/{len(self.payload)}')
+        self.assertEqual(response['Content-Length'], '10')
+        self.assertEqual(self.body(response), self.payload[10:20])
+
+        suffix = self.get(self.owner, Range='bytes=-4')
+        self.assertEqual(self.body(suffix), self.payload[-4:])
+        open_ended = self.get(self.owner, Range=f'bytes={len(self.payload) - 3}-')
+        self.assertEqual(self.body(open_ended), self.payload[-3:])
+
+        unsatisfiable = self.get(self.owner, Range=f'bytes={len(self.payload)}-')
+        self.assertEqual(unsatisfiable.status_code, 416)
+        self.assertEqual(unsatisfiable['Content-Range'], f'bytes */{len(self.payload)}')
+
+    def test_if_range_and_if_none_match(self):
+        etag = self.get(self.owner)['ETag']
+        partial = self.get(self.owner, Range='bytes=0-3', **{'If-Range': etag})
+        self.assertEqual(partial.status_code, 206)
+        stale = self.get(self.owner, Range='bytes=0-3', **{'If-Range': '"stale"'})
+        self.assertEqual(stale.status_code, 200)
+        self.assertEqual(self.body(stale), self.payload)
+        self.assertEqual(self.get(self.owner, **{'If-None-Match': etag}).status_code, 304)
+
+    async def test_asgi_streams_in_chunks(self):
+        await self.async_client.aforce_login(self.owner)
+        response = await self.async_client.get(self.url, headers={'Range': 'bytes=100-'})
+        self.assertEqual(response.status_code, 206)
+        self.assertTrue(response.is_async)
+        self.assertEqual(b''.join([chunk async for chunk in response]), self.payload[100:])
+
+    @override_settings(MEDIA_ACCEL='x-accel')
+    def test_accel_redirect_handoff(self):
+        response = self.get(self.owner)
+        self.assertEqual(response['X-Accel-Redirect'], '/protected-media/' + self.report.video.name)
+        self.assertEqual(response.content, b'')
+        self.assertEqual(self.get(self.other).status_code, 404)
+
+    def test_files_no_row_uses_are_not_served(self):
+        upload = VideoUpload.objects.create(
+            report=self.report, user=self.owner, filename='b.mp4', content_type='video/mp4', total_size=4096,
+        )
+        upload.append(BytesIO(MP4_HEAD), 0, len(MP4_HEAD))
+        part = os.path.relpath(upload.part_path, settings.MEDIA_ROOT)
+        for user in (self.owner, self.admin):
+            self.client.force_login(user)
+            self.assertEqual(self.client.get(f'/media/{part}').status_code, 404)
+
+        name = self.report.video.name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.report.delete()
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(f'/media/{name}').status_code, 404)
+
+    def test_shared_file_is_public_if_any_user_is(self):
+        Report.objects.create(title='Same clip', description='x', created_by=self.other, video=self.report.video.name)
+        self.assertEqual(self.get(self.other).status_code, 200)
+
+    def test_paths_outside_media_root_are_refused(self):
+        self.client.force_login(self.owner)
+        self.assertEqual(self.client.get('/media/../config/settings.py').status_code, 404)
+        self.assertEqual(self.client.get('/media/cas/missing.mp4').status_code, 404)
+
+
+class ReportApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+        cls.other = CustomUser.objects.create_user(username='other', password='pass12345', is_approved=True)
+        for i in range(PAGE_SIZE + 2):
+            Report.objects.create(title=f'Report {i}', description='x', created_by=cls.other)
+        cls.own_home = Report.objects.create(title='Mine', description='x', report_type='home', created_by=cls.user)
+        cls.other_home = Report.objects.create(title='Theirs', description='x', report_type='home', created_by=cls.other)
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_pages_match_report_list_visibility(self):
+        url = reverse('api:report_list')
+        first = self.client.get(url).json()
+        second = self.client.get(url, {'cursor': first['next']}).json()
+        ids = [r['id'] for r in first['results'] + second['results']]
+        self.assertEqual(len(ids), PAGE_SIZE + 3)
+        self.assertIn(self.own_home.pk, ids)
+        self.assertNotIn(self.other_home.pk, ids)
+        self.assertIsNone(second['next'])
+
+    def test_sparse_fieldsets(self):
+        response = self.client.get(reverse('api:report_list'), {'fields': 'title,id'})
+        self.assertEqual(list(response.json()['results'][0]), ['id', 'title'])
+        self.assertEqual(self.client.get(reverse('api:report_list'), {'fields': 'password'}).status_code, 400)
+
+    def test_etag_revalidation(self):
+        url = reverse('api:report_list')
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # A different fieldset is a different representation.
+        self.assertEqual(self.client.get(url, {'fields': 'id'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        self.own_home.add_comment(self.other, 'Seen it')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_comments_follow_report_visibility(self):
+        self.own_home.add_comment(self.other, 'Seen it')
+        response = self.client.get(reverse('api:comment_list', args=[self.own_home.pk]))
+        self.assertEqual(response.json()['results'][0]['content'], 'Seen it')
+        self.assertEqual(self.client.get(reverse('api:comment_list', args=[self.other_home.pk])).status_code, 404)
+
+    def test_errors_are_json(self):
+        self.assertEqual(self.client.post(reverse('api:report_list')).status_code, 405)
+        self.client.logout()
+        response = self.client.get(reverse('api:report_list'))
+        self.assertEqual(response.status_code, 401)
+        self.assertIn('error', response.json())
+
+
+def reload_urlconf():
+    """Re-evaluate the URLconfs, whose live routes depend on ASYNC_VIEWS."""
+    for name in ('reports.urls', 'users.urls', 'config.urls'):
+        importlib.reload(sys.modules[name])
+    clear_url_caches()
+
+
+class LiveFeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+        cls.other = CustomUser.objects.create_user(username='other', password='pass12345', is_approved=True)
+        cls.report = Report.objects.create(title='Bins', description='x', created_by=cls.user)
+        cls.private = Report.objects.create(title='Mine', description='x', report_type='home', created_by=cls.other)
+
+    def setUp(self):
+        self.addCleanup(reload_urlconf)
+        self.enterContext(override_settings(ASYNC_VIEWS=True))
+        reload_urlconf()
+
+    def subscribe(self, topic):
+        subscription = broker.subscribe([topic])
+        self.addCleanup(broker.unsubscribe, subscription)
+        return subscription
+
+    async def test_comments_and_status_changes_are_published_after_commit(self):
+        subscription = self.subscribe(f'report:{self.report.pk}')
+
+        def write():
+            with self.captureOnCommitCallbacks(execute=True):
+                self.report.add_comment(self.other, 'Still overflowing')
+            with self.captureOnCommitCallbacks(execute=True):
+                Report.objects.get(pk=self.report.pk).mark_resolved(self.other)
+
+        await sync_to_async(write)()
+        await asyncio.sleep(0)
+        comment, status = subscription.queue.get_nowait(), subscription.queue.get_nowait()
+        self.assertEqual(comment[1], 'comment')
+        self.assertIn('Still overflowing', comment[2])
+        self.assertEqual(status[1:], ('status', '{"report": %d, "status": "resolved", "status_display": "Resolved"}' % self.report.pk))
+
+    @override_settings(LIVE_QUEUE_SIZE=2)
+    async def test_slow_subscribers_are_reset(self):
+        subscription = self.subscribe('notices')
+        for i in range(5):
+            await sync_to_async(broker.publish, thread_sensitive=False)('notices', 'notice', {'id': i})
+        await asyncio.sleep(0)
+        chunks = [chunk async for chunk in event_stream(subscription)]
+        self.assertTrue(chunks[0].startswith('retry:'))
+        self.assertTrue(chunks[-1].startswith('event: reset'))
+        self.assertNotIn(subscription, broker._subscriptions)
+
+    async def test_stream_endpoint_checks_visibility(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('reports:report_live', args=[self.report.pk]))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = aiter(response.streaming_content)
+        self.assertTrue((await anext(stream)).startswith(b'retry:'))
+        await stream.aclose()
+
+        response = await self.async_client.get(reverse('reports:report_live', args=[self.private.pk]))
+        self.assertEqual(response.status_code, 404)
+
+    @override_settings(LIVE_MAX_CONNECTIONS=0)
+    async def test_connection_cap(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse('reports:report_live', args=[self.report.pk]))
+        self.assertEqual(response.status_code, 503)
+
+    def test_wsgi_clients_are_told_to_stop(self):
+        self.client.force_login(self.user)
+        response = self.client.get(reverse('reports:report_live', args=[self.report.pk]))
+        self.assertEqual(response.status_code, 204)
+        self.assertContains(self.client.get(reverse('reports:report_detail', args=[self.report.pk])), 'EventSource')
+
+    @override_settings(ASYNC_VIEWS=False)
+    def test_feeds_are_off_without_async_views(self):
+        reload_urlconf()
+        self.client.force_login(self.user)
+        self.assertNotContains(self.client.get(reverse('reports:report_detail', args=[self.report.pk])), 'EventSource')
+        self.assertNotContains(self.client.get(reverse('users:noticeboard')), 'EventSource')
+        self.assertEqual(self.client.get(f'/reports/{self.report.pk}/live/').status_code, 404)
+
+
+class ReportFragmentCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+        cls.report = Report.objects.create(title='Bins', description='Overflowing', created_by=cls.user)
+        cls.report.add_comment(cls.user, 'First!')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.user)
+        self.url = reverse('reports:report_detail', args=[self.report.pk])
+
+    def test_warm_thread_skips_comment_query(self):
+        self.client.get(self.url)
+        # Just the report: session, user and thread all come from the cache.
+        with self.assertNumQueries(1):
+            self.assertContains(self.client.get(self.url), 'First!')
+
+    def test_new_comment_and_edit_are_visible(self):
+        self.client.get(self.url)
+        self.report.add_comment(self.user, 'Second')
+        Report.objects.filter(pk=self.report.pk).update(description='Cleared', updated_at=timezone.now() + timedelta(seconds=1))
+        response = self.client.get(self.url)
+        self.assertContains(response, 'Second')
+        self.assertContains(response, 'Cleared')
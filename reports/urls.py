@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
@@ -8,4 +9,10 @@ urlpatterns = [
     path('create/', views.create_report, name='create_report'),
     path('<int:pk>/', views.report_detail, name='report_detail'),
     path('<int:pk>/delete/', views.delete_report, name='delete_report'),
+    path('<int:pk>/video-uploads/', views.start_video_upload, name='start_video_upload'),
+    path('video-uploads/<uuid:upload_id>/', views.video_upload, name='video_upload'),
 ]
+
+# The SSE feeds hold their connection open; only ASGI serves them cheaply.
+if settings.ASYNC_VIEWS:
+    urlpatterns.append(path('<int:pk>/live/', views.report_live, name='report_live'))
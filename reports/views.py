@@ -1,11 +1,22 @@
-from django.shortcuts import render, redirect, get_object_or_404
+import os
+
+from django.conf import settings
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import Http404, HttpResponseForbidden, JsonResponse
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.views.decorators.http import require_http_methods
-from django.db.models import Q
-from .models import Report, ReportComment
-from users.models import UserApprovalNotification
+from django.db.models import OuterRef, Subquery
+from .media import can_view_media
+from .models import Report, ReportComment, VideoUpload
+from users.tasks import notify_user
+from django.urls import reverse
 from django.utils import timezone
+from config.live import live_updates_enabled, stream_response
+from config.media import serve_file
+from config.pagination import paginate_by_cursor, cursor_querystring
+from config.storage import media_storage
 
 @login_required(login_url='users:login')
 def report_list(request):
@@ -13,20 +24,20 @@ def report_list(request):
         messages.warning(request, 'Your account is pending approval.')
         return redirect('users:pending')
     
-    if request.user.is_community_admin():
-        reports = Report.objects.all().order_by('-created_at')
-    else:
-        reports = Report.objects.filter(
-            Q(report_type='community') | Q(created_by=request.user)
-        ).order_by('-created_at')
+    reports = Report.objects.visible_to(request.user).select_related('created_by')
     
     status_filter = request.GET.get('status', '')
     if status_filter:
         reports = reports.filter(status=status_filter)
     
+    page = paginate_by_cursor(reports, request.GET.get('cursor'))
+    
     context = {
-        'reports': reports,
+        'reports': page,
+        'page': page,
         'status_filter': status_filter,
+        'next_query': cursor_querystring(request, page.next_cursor) if page.has_next else '',
+        'prev_query': cursor_querystring(request, page.prev_cursor) if page.has_previous else '',
     }
     return render(request, 'reports/report_list.html', context)
 
@@ -59,10 +70,21 @@ def create_report(request):
             report.photo = request.FILES['photo']
         
         if 'video' in request.FILES:
-            report.video = request.FILES['video']
+            video = request.FILES['video']
+            error = video_upload_error(video.name, video.content_type, video.size)
+            if error:
+                messages.warning(request, f'Video was not attached: {error[1]}')
+            else:
+                report.video = video
         
         report.save()
         messages.success(request, 'Report created successfully!')
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return JsonResponse({
+                'id': report.id,
+                'url': reverse('reports:report_detail', args=[report.id]),
+                'upload_url': reverse('reports:start_video_upload', args=[report.id]),
+            })
         return redirect('reports:report_detail', pk=report.id)
     
     return render(request, 'reports/create_report.html')
@@ -73,32 +95,33 @@ def report_detail(request, pk):
     if not request.user.is_approved:
         return redirect('users:pending')
     
-    report = get_object_or_404(Report, pk=pk)
+    # The newest comment id versions the cached comment thread.
+    last_comment = ReportComment.objects.filter(report=OuterRef('pk')).order_by('-created_at', '-id').values('id')[:1]
+    report = get_object_or_404(
+        Report.objects.select_related('created_by', 'resolved_by').annotate(last_comment_id=Subquery(last_comment)),
+        pk=pk,
+    )
     
     if report.report_type == 'home' and report.created_by != request.user and not request.user.is_community_admin():
         messages.error(request, 'You do not have permission to view this report.')
         return redirect('reports:report_list')
     
-    comments = report.comments.all()
+    comments = report.comments.select_related('user')
     
     if request.method == 'POST':
         if 'comment' in request.POST:
             content = request.POST.get('comment')
-            ReportComment.objects.create(
-                report=report,
-                user=request.user,
-                content=content
-            )
+            report.add_comment(request.user, content)
             messages.success(request, 'Comment added successfully!')
             return redirect('reports:report_detail', pk=report.id)
         
         elif 'resolve' in request.POST and request.user.is_community_admin():
             report.mark_resolved(request.user)
             
-            if report.created_by:
-                UserApprovalNotification.objects.create(
-                    user=report.created_by,
-                    message=f'Your report "{report.title}" has been marked as Resolved by {request.user.get_full_name()}'
+            if report.created_by_id:
+                notify_user.enqueue(
+                    report.created_by_id,
+                    f'Your report "{report.title}" has been marked as Resolved by {request.user.get_full_name()}',
                 )
             
             messages.success(request, 'Report marked as resolved!')
@@ -107,6 +130,7 @@ def report_detail(request, pk):
     context = {
         'report': report,
         'comments': comments,
+        'live_updates': live_updates_enabled(),
     }
     return render(request, 'reports/report_detail.html', context)
 
@@ -118,7 +142,7 @@ def delete_report(request, pk):
     
     report = get_object_or_404(Report, pk=pk)
     
-    if report.created_by != request.user and not request.user.is_community_admin():
+    if report.created_by_id != request.user.id and not request.user.is_community_admin():
         messages.error(request, 'You do not have permission to delete this report.')
         return redirect('reports:report_list')
     
@@ -129,3 +153,125 @@ def delete_report(request, pk):
     
     context = {'report': report}
     return render(request, 'reports/confirm_delete.html', context)
+
+
+@login_required(login_url='users:login')
+async def report_live(request, pk):
+    """SSE feed of new comments and status changes for one report."""
+    user = await request.auser()
+    if not user.is_approved:
+        return HttpResponseForbidden()
+    report = await aget_object_or_404(Report.objects.visible_to(user), pk=pk)
+    return stream_response(request, [f'report:{report.pk}'])
+
+
+VIDEO_SIGNATURES = {
+    'video/mp4': lambda head: head[4:8] == b'ftyp',
+    'video/quicktime': lambda head: head[4:8] in (b'ftyp', b'moov', b'mdat', b'wide', b'free'),
+    'video/3gpp': lambda head: head[4:8] == b'ftyp',
+    'video/webm': lambda head: head[:4] == b'\x1a\x45\xdf\xa3',
+}
+
+
+def video_upload_error(filename, content_type, size):
+    """Return (status, message) if the declared upload breaks the limits, else None."""
+    allowed = settings.REPORT_VIDEO_TYPES
+    extension = os.path.splitext(filename or '')[1].lower()
+    if content_type not in allowed or extension not in allowed[content_type]:
+        return 415, 'unsupported video type.'
+    if size <= 0 or size > settings.REPORT_VIDEO_MAX_SIZE:
+        return 413, f'video must be at most {settings.REPORT_VIDEO_MAX_SIZE // (1024 * 1024)} MB.'
+    return None
+
+
+def upload_state(upload):
+    return {
+        'upload_id': str(upload.id),
+        'offset': upload.received_bytes,
+        'total': upload.total_size,
+        'chunk_size': settings.REPORT_VIDEO_CHUNK_SIZE,
+        'complete': upload.is_complete,
+        'upload_url': reverse('reports:video_upload', args=[upload.id]),
+        'report_url': reverse('reports:report_detail', args=[upload.report_id]),
+    }
+
+
+@login_required(login_url='users:login')
+@require_http_methods(["POST"])
+def start_video_upload(request, pk):
+    if not request.user.is_approved:
+        return JsonResponse({'error': 'Account pending approval.'}, status=403)
+    
+    report = get_object_or_404(Report, pk=pk, created_by=request.user)
+    filename = os.path.basename(request.POST.get('filename', ''))
+    content_type = request.POST.get('content_type', '')
+    try:
+        size = int(request.POST.get('size', 0))
+    except ValueError:
+        size = 0
+    
+    error = video_upload_error(filename, content_type, size)
+    if error:
+        return JsonResponse({'error': error[1]}, status=error[0])
+    
+    upload = VideoUpload.objects.create(
+        report=report,
+        user=request.user,
+        filename=filename,
+        content_type=content_type,
+        total_size=size,
+    )
+    return JsonResponse(upload_state(upload), status=201)
+
+
+@login_required(login_url='users:login')
+@require_http_methods(["GET", "PUT"])
+def video_upload(request, upload_id):
+    upload = get_object_or_404(VideoUpload, pk=upload_id, user=request.user)
+    
+    if request.method == 'GET' or upload.is_complete:
+        return JsonResponse(upload_state(upload))
+    
+    try:
+        offset = int(request.headers.get('Upload-Offset', ''))
+        length = int(request.META.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        return JsonResponse({'error': 'Upload-Offset and Content-Length are required.'}, status=400)
+    
+    if offset != upload.received_bytes:
+        return JsonResponse({**upload_state(upload), 'error': 'Offset mismatch; resume from offset.'}, status=409)
+    if length <= 0 or length > settings.REPORT_VIDEO_CHUNK_SIZE or offset + length > upload.total_size:
+        return JsonResponse({**upload_state(upload), 'error': 'Chunk too large.'}, status=413)
+    
+    # Stream straight from the socket to disk; request.body would buffer it.
+    try:
+        appended = upload.append(request, offset, length)
+    except VideoUpload.OffsetConflict:
+        upload.refresh_from_db()
+        return JsonResponse({**upload_state(upload), 'error': 'Offset mismatch; resume from offset.'}, status=409)
+    if not appended:
+        return JsonResponse({**upload_state(upload), 'error': 'Incomplete chunk.'}, status=400)
+    
+    if offset == 0 and not VIDEO_SIGNATURES[upload.content_type](upload.read_head(16)):
+        upload.discard()
+        return JsonResponse({'error': 'File content does not match its video type.'}, status=415)
+    
+    if upload.received_bytes == upload.total_size:
+        upload.finish()
+    
+    return JsonResponse(upload_state(upload))
+
+
+@require_http_methods(["GET", "HEAD"])
+def serve_media(request, name):
+    # Not found rather than forbidden, so private uploads don't reveal that they exist.
+    if not can_view_media(request.user, name):
+        raise Http404
+    try:
+        path = media_storage().path(name)
+    except SuspiciousFileOperation:
+        raise Http404
+    response = serve_file(request, path, name)
+    if response is None:
+        raise Http404
+    return response
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 from .models import CustomUser, UserApprovalNotification, NoticeBoard
+from . import approvals
 
 class CustomUserAdmin(UserAdmin):
     model = CustomUser
@@ -15,27 +16,14 @@ class CustomUserAdmin(UserAdmin):
     # ⭐ ADD THESE TWO METHODS
     def approve_users(self, request, queryset):
         """Bulk approve users"""
-        approved_count = 0
-        for user in queryset:
-            if not user.is_approved:
-                user.is_approved = True
-                user.save()
-                # Create notification
-                UserApprovalNotification.objects.create(
-                    user=user,
-                    message=f'Your account has been approved by {request.user.get_full_name() or "Admin"}!',
-                    approved_by=request.user
-                )
-                approved_count += 1
-        
+        approved_count = approvals.approve_users(queryset, request.user)
         self.message_user(request, f'{approved_count} user(s) approved successfully!')
     
     approve_users.short_description = '✅ Approve selected users'
     
     def reject_users(self, request, queryset):
         """Bulk reject users"""
-        rejected_count = queryset.count()
-        queryset.delete()
+        rejected_count = approvals.reject_users(queryset)
         self.message_user(request, f'{rejected_count} user(s) rejected and deleted!')
     
     reject_users.short_description = '❌ Reject selected users'
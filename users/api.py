@@ -0,0 +1,19 @@
+from config.api import api_view, json_page
+from .models import NoticeBoard
+
+
+NOTICE_FIELDS = {
+    'id': lambda n: n.pk,
+    'title': lambda n: n.title,
+    'content': lambda n: n.content,
+    'is_important': lambda n: n.is_important,
+    'admin': lambda n: n.admin.username,
+    'created_at': lambda n: n.created_at,
+    'updated_at': lambda n: n.updated_at,
+}
+
+
+@api_view
+def notice_list(request):
+    notices = NoticeBoard.objects.select_related('admin')
+    return json_page(request, notices, NOTICE_FIELDS, lambda n: (n.updated_at,))
@@ -0,0 +1,46 @@
+from django.db import connection, transaction
+
+from .backends import forget_users
+from .models import CustomUser
+from .stats import bump_version
+from .tasks import send_approval_notifications
+
+
+def approval_message(approved_by):
+    return f'Your account has been approved by {approved_by.get_full_name() or "Admin"}!'
+
+
+def approve_users(queryset, approved_by):
+    """
+    Approve every still-pending user in ``queryset``; returns how many.
+
+    One UPDATE ... RETURNING flips the flag and reports which rows it
+    flipped, so of two admins approving the same users at once only one
+    notifies each of them. The notifications are queued as a single task in
+    the same transaction. The UPDATE fires no model signals, so the
+    landing-stats version is bumped and the cached users are dropped here
+    once the transaction commits.
+    """
+    selected, params = queryset.order_by().values('id').query.sql_with_params()
+    qn = connection.ops.quote_name
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"UPDATE {qn(CustomUser._meta.db_table)} SET {qn('is_approved')} = %s "
+                f"WHERE {qn('is_approved')} = %s AND {qn('id')} IN ({selected}) RETURNING {qn('id')}",
+                [True, False, *params],
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+        if not ids:
+            return 0
+        send_approval_notifications.enqueue(ids, approved_by.pk, approval_message(approved_by))
+        transaction.on_commit(bump_version)
+        transaction.on_commit(lambda: forget_users(*ids))
+    return len(ids)
+
+
+def reject_users(queryset):
+    """Delete the users in ``queryset`` in one transaction; returns how many."""
+    with transaction.atomic():
+        deleted = queryset.delete()[1].get(CustomUser._meta.label, 0)
+    return deleted
@@ -0,0 +1,40 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+
+def user_key(user_id):
+    return f'auth-user:{user_id}'
+
+
+def forget_users(*user_ids):
+    cache.delete_many([user_key(user_id) for user_id in user_ids])
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ModelBackend that answers AuthenticationMiddleware's per-request user
+    lookup from the cache.
+
+    Entries are dropped when a user is saved, deleted, approved or moves
+    their notice watermark (see users.signals and users.approvals); the
+    short timeout bounds anything written with a bare UPDATE elsewhere.
+    """
+
+    def get_user(self, user_id):
+        user = cache.get(user_key(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(user_key(user_id), user, settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+        return user if self.user_can_authenticate(user) else None
+
+    async def aget_user(self, user_id):
+        user = await cache.aget(user_key(user_id))
+        if user is None:
+            user = await super().aget_user(user_id)
+            if user is not None:
+                await cache.aset(user_key(user_id), user, settings.AUTH_USER_CACHE_TIMEOUT)
+            return user
+        return user if self.user_can_authenticate(user) else None
@@ -0,0 +1,9 @@
+from .notifications import unread_count
+
+
+def unread_notifications(request):
+    """Unread badge for the navbar, served from the per-user cached counter."""
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated or not user.is_approved:
+        return {'unread_count': 0}
+    return {'unread_count': unread_count(user)}
@@ -0,0 +1,91 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+PROFILES = {
+    'development': 'config.settings',
+    'production': 'config.settings_production',
+}
+
+PATHS = ['/', '/login/', '/register/']
+
+# Runs in a fresh interpreter, so the timings include importing Django and
+# the project; `manage.py` would already have called django.setup().
+CHILD = 'from users.management.commands.bench_startup import measure; measure()'
+
+
+def measure():
+    requests, *paths = sys.argv[1:]
+    start = time.perf_counter()
+    import django
+    django.setup()
+    setup = time.perf_counter() - start
+
+    from django.test import Client
+    client = Client()
+    start = time.perf_counter()
+    response = client.get(paths[0])
+    first = time.perf_counter() - start
+    if response.status_code != 200:
+        sys.exit(f'{paths[0]} returned {response.status_code}')
+
+    start = time.perf_counter()
+    for i in range(int(requests)):
+        client.get(paths[i % len(paths)])
+    warm = time.perf_counter() - start
+    print(json.dumps({'setup': setup, 'first': first, 'rps': int(requests) / warm}))
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure cold start (django.setup() plus the first request) and warm request '
+        'throughput for each settings profile, in fresh processes against a scratch database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=3, help='Fresh processes per profile; medians are reported.')
+        parser.add_argument('--requests', type=int, default=300, help='Warm requests per process.')
+        parser.add_argument('--path', action='append', help=f"Path(s) to request (default: {', '.join(PATHS)}).")
+        parser.add_argument('--profile', choices=PROFILES, action='append', help='Profile(s) to run (default: all).')
+
+    def handle(self, *args, **options):
+        paths = options['path'] or PATHS
+        self.stdout.write(f"{'profile':<12} {'setup ms':>9} {'first ms':>9} {'cold ms':>9} {'warm req/s':>11}")
+        for profile in options['profile'] or PROFILES:
+            with tempfile.TemporaryDirectory() as scratch:
+                env = {key: value for key, value in os.environ.items() if key != 'DJANGO_DB_PROFILE'}
+                env.update({
+                    'DJANGO_SETTINGS_MODULE': PROFILES[profile],
+                    'DJANGO_DB_NAME': os.path.join(scratch, 'bench.sqlite3'),
+                    'DJANGO_CACHE_DIR': os.path.join(scratch, 'cache'),
+                    'DJANGO_STATIC_ROOT': os.path.join(scratch, 'static'),
+                    'DJANGO_SECRET_KEY': os.environ.get('DJANGO_SECRET_KEY', 'bench-startup-only'),
+                    'DJANGO_ALLOWED_HOSTS': 'testserver',
+                })
+                self.run(env, [str(settings.BASE_DIR / 'manage.py'), 'migrate', '--verbosity', '0'])
+                # The production storage needs the manifest that collectstatic writes.
+                self.run(env, [str(settings.BASE_DIR / 'manage.py'), 'collectstatic', '--noinput', '--verbosity', '0'])
+                runs = [
+                    json.loads(self.run(env, ['-c', CHILD, str(options['requests']), *paths]))
+                    for _ in range(options['runs'])
+                ]
+            setup = statistics.median(run['setup'] for run in runs) * 1000
+            first = statistics.median(run['first'] for run in runs) * 1000
+            rps = statistics.median(run['rps'] for run in runs)
+            self.stdout.write(f'{profile:<12} {setup:>9.1f} {first:>9.1f} {setup + first:>9.1f} {rps:>11.1f}')
+
+    def run(self, env, args):
+        child = subprocess.run(
+            [sys.executable, *args], env=env, cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if child.returncode:
+            raise CommandError(child.stderr.strip())
+        return child.stdout
@@ -0,0 +1,121 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from events.models import Event
+from reports.models import Report, VideoUpload
+from users.models import CustomUser
+from .bench_views import percentiles
+
+
+# (url name, argument, role). The argument names a benchmark object or is
+# passed through literally; the role picks who is logged in.
+ROUTES = [
+    ('users:index', None, None),
+    ('users:register', None, None),
+    ('users:login', None, None),
+    ('users:pending', None, 'waiting'),
+    ('users:dashboard', None, 'member'),
+    ('users:account', None, 'member'),
+    ('users:noticeboard', None, 'member'),
+    ('users:settings', None, 'member'),
+    ('users:search', None, 'member'),
+    ('users:admin_dashboard', None, 'admin'),
+    ('users:admin_dashboard_section', 'pending', 'admin'),
+    ('users:admin_dashboard_section', 'approved', 'admin'),
+    ('users:admin_dashboard_section', 'reports', 'admin'),
+    ('users:admin_dashboard_section', 'events', 'admin'),
+    ('reports:report_list', None, 'member'),
+    ('reports:create_report', None, 'member'),
+    ('reports:report_detail', 'report', 'member'),
+    ('reports:delete_report', 'report', 'admin'),
+    ('reports:video_upload', 'upload', 'uploader'),
+    ('events:event_list', None, 'member'),
+    ('events:create_event', None, 'member'),
+    ('events:event_detail', 'event', 'member'),
+    ('events:delete_event', 'event', 'admin'),
+    ('api:report_list', None, 'member'),
+    ('api:comment_list', 'report', 'member'),
+    ('api:event_list', None, 'member'),
+    ('api:notice_list', None, 'member'),
+]
+
+QUERY_STRINGS = {'users:search': '?q=bins'}
+
+
+class Command(BaseCommand):
+    help = (
+        'Request every page through the test client as the role that can see it, against the '
+        'configured database, and report p50/p99 latency and query counts per URL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=50, help='Timed requests per URL.')
+        parser.add_argument('--warmup', type=int, default=3, help='Untimed requests per URL first.')
+        parser.add_argument('--url', action='append', help='Only these URL names.')
+        parser.add_argument('--json', action='store_true', help='Print the results as JSON.')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2:
+            raise CommandError('--requests must be at least 2.')
+        users, objects = self.fixtures()
+        clients = {None: Client()}
+        for role, user in users.items():
+            if user is not None:
+                clients[role] = Client()
+                clients[role].force_login(user)
+
+        results = []
+        for name, arg, role in ROUTES:
+            if options['url'] and name not in options['url']:
+                continue
+            if (role and users.get(role) is None) or (arg in ('report', 'event', 'upload') and objects[arg] is None):
+                self.stderr.write(f'Skipping {name}: nothing to request it with.')
+                continue
+            url = reverse(name, args=[objects[arg].pk if arg in objects else arg] if arg else None)
+            url += QUERY_STRINGS.get(name, '')
+            results.append({'url': url, 'name': name, 'role': role or 'anonymous', **self.measure(clients[role], url, options)})
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        self.stdout.write(f"{'url':<40} {'role':<10} {'status':>6} {'p50 ms':>8} {'p99 ms':>8} {'queries':>8}")
+        for row in results:
+            self.stdout.write(
+                f"{row['url']:<40} {row['role']:<10} {row['status']:>6} {row['p50']:>8.2f} {row['p99']:>8.2f} {row['queries']:>8}"
+            )
+
+    def fixtures(self):
+        """Who to log in as and which objects to open: the busiest ones, for worst-case pages."""
+        approved = CustomUser.objects.filter(is_approved=True, is_active=True)
+        upload = VideoUpload.objects.select_related('user').order_by('-pk').first()
+        users = {
+            'member': approved.filter(role='user').order_by('pk').first(),
+            'admin': approved.filter(role='admin').order_by('pk').first(),
+            'waiting': CustomUser.objects.filter(is_approved=False, is_active=True).order_by('pk').first(),
+            'uploader': upload.user if upload else None,
+        }
+        objects = {
+            'report': Report.objects.filter(report_type='community').order_by('-comment_count', 'pk').first(),
+            'event': Event.objects.order_by('-attendee_count', 'pk').first(),
+            'upload': upload,
+        }
+        return users, objects
+
+    def measure(self, client, url, options):
+        for _ in range(options['warmup']):
+            client.get(url)
+        samples, queries = [], []
+        for _ in range(options['requests']):
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = client.get(url)
+                samples.append((time.perf_counter() - start) * 1000)
+            queries.append(len(captured))
+        stats = percentiles(samples)
+        return {'status': response.status_code, 'p50': stats['p50'], 'p99': stats['p99'], 'queries': max(queries)}
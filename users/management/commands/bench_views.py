@@ -0,0 +1,109 @@
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+from django.urls import reverse
+
+from users.models import CustomUser
+
+
+VIEWS = ['users:dashboard', 'users:account']
+
+
+def percentiles(samples):
+    cuts = statistics.quantiles(samples, n=100, method='inclusive')
+    return {'p50': cuts[49], 'p99': cuts[98], 'mean': statistics.fmean(samples)}
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare p50/p99 latency of the dashboard views served sync (WSGI handler) '
+        'and async (ASGI handler), in-process against the configured database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Timed requests per view.')
+        parser.add_argument('--concurrency', type=int, default=8, help='Requests in flight at once.')
+        parser.add_argument('--username', help='Approved user to log in as (default: the first one).')
+        parser.add_argument('--mode', choices=['sync', 'async'], help='Measure one mode and print JSON.')
+
+    def handle(self, *args, **options):
+        if options['mode']:
+            self.stdout.write(json.dumps(self.measure(options)))
+            return
+
+        # URLs pick their view implementation at import, so each mode gets its own process.
+        results = {}
+        for mode in ('sync', 'async'):
+            command = [
+                sys.executable, str(settings.BASE_DIR / 'manage.py'), 'bench_views', '--mode', mode,
+                '--requests', str(options['requests']), '--concurrency', str(options['concurrency']),
+            ]
+            if options['username']:
+                command += ['--username', options['username']]
+            env = {**os.environ, 'DJANGO_ASYNC_VIEWS': '1' if mode == 'async' else '0'}
+            child = subprocess.run(command, env=env, capture_output=True, text=True)
+            if child.returncode:
+                raise CommandError(child.stderr.strip())
+            results[mode] = json.loads(child.stdout)
+
+        self.stdout.write(f"{'view':<20} {'mode':<6} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9}")
+        for name in VIEWS:
+            for mode in ('sync', 'async'):
+                row = results[mode][name]
+                self.stdout.write(f"{name:<20} {mode:<6} {row['p50']:>9.2f} {row['p99']:>9.2f} {row['mean']:>9.2f}")
+
+    def measure(self, options):
+        users = CustomUser.objects.filter(is_approved=True)
+        user = users.filter(username=options['username']).first() if options['username'] else users.first()
+        if user is None:
+            raise CommandError('No approved user to log in as.')
+
+        login = Client()
+        login.force_login(user)
+        try:
+            urls = {name: reverse(name) for name in VIEWS}
+            run = self.run_async if options['mode'] == 'async' else self.run_sync
+            return {
+                name: percentiles(run(url, login.cookies, options['requests'], options['concurrency']))
+                for name, url in urls.items()
+            }
+        finally:
+            login.logout()
+
+    def run_sync(self, url, cookies, requests, concurrency):
+        def timed(_):
+            client = Client()
+            client.cookies = cookies
+            start = time.perf_counter()
+            client.get(url)
+            return (time.perf_counter() - start) * 1000
+
+        with ThreadPoolExecutor(concurrency) as pool:
+            list(pool.map(timed, range(concurrency)))  # warm-up
+            return list(pool.map(timed, range(requests)))
+
+    def run_async(self, url, cookies, requests, concurrency):
+        async def main():
+            gate = asyncio.Semaphore(concurrency)
+
+            async def timed():
+                async with gate:
+                    client = AsyncClient()
+                    client.cookies = cookies
+                    start = time.perf_counter()
+                    await client.get(url)
+                    return (time.perf_counter() - start) * 1000
+
+            await asyncio.gather(*(timed() for _ in range(concurrency)))  # warm-up
+            return await asyncio.gather(*(timed() for _ in range(requests)))
+
+        return asyncio.run(main())
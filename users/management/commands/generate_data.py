@@ -0,0 +1,189 @@
+import itertools
+import random
+import time
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from events.models import Event, EventAttendee
+from reports.models import Report, ReportComment
+from users.models import CustomUser, NoticeBoard
+from users.notifications import bump_notice_version
+from users.stats import bump_version
+
+
+PROBLEMS = ['Overflowing bins', 'Broken streetlight', 'Pothole', 'Illegal dumping', 'Blocked drain', 'Graffiti', 'Noise']
+PLACES = ['Main Street', 'Park Avenue', 'Station Road', 'Market Square', 'River Walk', 'School Lane', 'Hill Crescent']
+DETAILS = [
+    'It has been like this for a week.',
+    'Residents have complained several times.',
+    'It is getting worse after the rain.',
+    'Children walk past here every day.',
+    'Photos were taken this morning.',
+]
+EVENT_KINDS = ['Cleanup', 'Tree planting', 'Town hall', 'Recycling drive', 'Street party', 'Safety walk']
+COMMENTS = ['+1', 'Seen this too.', 'Reported to the council.', 'Still not fixed.', 'Thanks for flagging!', 'Any update?']
+
+# Shares of the generated reports; the rest are community / pending.
+HOME_SHARE = 0.3
+STATUS_WEIGHTS = {'pending': 5, 'in_progress': 2, 'resolved': 3}
+
+
+def batched(rows, size):
+    rows = iter(rows)
+    while batch := list(itertools.islice(rows, size)):
+        yield batch
+
+
+def skewed(rng, n):
+    """An index below ``n``, most often a low one: a few reports draw most comments."""
+    return int(n * rng.random() ** 3)
+
+
+class Command(BaseCommand):
+    help = (
+        'Fill the database with synthetic users, reports, comments, events, attendees and notices '
+        'using bulk_create, to reproduce production volumes locally. The defaults add about 1M rows.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=10000)
+        parser.add_argument('--admins', type=int, default=20)
+        parser.add_argument('--reports', type=int, default=200000)
+        parser.add_argument('--comments', type=int, default=600000)
+        parser.add_argument('--events', type=int, default=5000)
+        parser.add_argument('--attendees', type=int, default=200000)
+        parser.add_argument('--notices', type=int, default=2000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--password', default='synthetic-pass', help='Password of every generated user.')
+        parser.add_argument('--seed', type=int, help='Random seed, for repeatable content.')
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        self.batch_size = options['batch_size']
+        # Usernames must be unique across runs.
+        self.run = format(int(time.time()), 'x')
+        started = time.monotonic()
+
+        admins, members = self.create_users(rng, options['admins'], options['users'], options['password'])
+        approved = [pk for pk, is_approved in members if is_approved]
+        posters = approved or admins
+        report_ids = self.create_reports(rng, options['reports'], options['comments'], posters, admins)
+        self.create_comments(rng, report_ids, options['comments'], posters + admins)
+        self.create_events(rng, options['events'], options['attendees'], admins, approved)
+        self.create_notices(rng, options['notices'], admins)
+
+        # bulk_create sends no signals; drop what the caches derived from the old rows.
+        bump_version()
+        bump_notice_version()
+        self.stdout.write(self.style.SUCCESS(f'Done in {time.monotonic() - started:.1f}s.'))
+
+    def insert(self, model, rows):
+        """bulk_create ``rows`` in batches, one transaction each; returns the new primary keys."""
+        started = time.monotonic()
+        pks = []
+        for batch in batched(rows, self.batch_size):
+            with transaction.atomic():
+                pks.extend(obj.pk for obj in model.objects.bulk_create(batch))
+        elapsed = time.monotonic() - started
+        self.stdout.write(f'{model._meta.verbose_name_plural:<24} {len(pks):>9} rows {elapsed:>8.1f}s')
+        return pks
+
+    def create_users(self, rng, admins, users, password):
+        password = make_password(password)
+
+        def rows():
+            for i in range(admins + users):
+                is_admin = i < admins
+                yield CustomUser(
+                    username=f'synthetic-{self.run}-{i}',
+                    password=password,
+                    first_name=rng.choice(['Alex', 'Sam', 'Priya', 'Chen', 'Maria', 'Tom', 'Aisha']),
+                    last_name=rng.choice(['Smith', 'Khan', 'Garcia', 'Wong', 'Okafor', 'Novak']),
+                    role='admin' if is_admin else 'user',
+                    # Most members are approved; a few wait in the admin queue.
+                    is_approved=is_admin or rng.random() < 0.95,
+                    community_name=rng.choice(PLACES),
+                )
+
+        pks = self.insert(CustomUser, rows())
+        flags = dict(CustomUser.objects.filter(pk__in=pks[admins:]).values_list('pk', 'is_approved'))
+        return pks[:admins], [(pk, flags[pk]) for pk in pks[admins:]]
+
+    def create_reports(self, rng, reports, comments, posters, admins):
+        # Decide up front which report each comment lands on, so the
+        # denormalised counter is right without a rebuild pass.
+        self.comment_counts = [0] * reports
+        for _ in range(comments if reports else 0):
+            self.comment_counts[skewed(rng, reports)] += 1
+        now = timezone.now()
+
+        def rows():
+            for i in range(reports):
+                status = rng.choices(list(STATUS_WEIGHTS), weights=list(STATUS_WEIGHTS.values()))[0]
+                problem, place = rng.choice(PROBLEMS), rng.choice(PLACES)
+                yield Report(
+                    title=f'{problem} on {place}',
+                    description=' '.join(rng.sample(DETAILS, 2)),
+                    report_type='home' if rng.random() < HOME_SHARE else 'community',
+                    status=status,
+                    location=f'{rng.randint(1, 300)} {place}',
+                    created_by_id=rng.choice(posters),
+                    resolved_by_id=rng.choice(admins) if status == 'resolved' and admins else None,
+                    resolved_at=now - timedelta(hours=rng.randint(1, 24 * 90)) if status == 'resolved' else None,
+                    comment_count=self.comment_counts[i],
+                )
+
+        return self.insert(Report, rows())
+
+    def create_comments(self, rng, report_ids, comments, authors):
+        def rows():
+            for report_id, count in zip(report_ids, self.comment_counts):
+                for _ in range(count):
+                    yield ReportComment(report_id=report_id, user_id=rng.choice(authors), content=rng.choice(COMMENTS))
+
+        self.insert(ReportComment, rows())
+
+    def create_events(self, rng, events, attendees, admins, members):
+        today = timezone.now().date()
+        per_event = attendees / events if events else 0
+        sizes = [min(len(members), round(per_event * rng.uniform(0.2, 1.8))) for _ in range(events)]
+
+        def rows():
+            for size in sizes:
+                kind, place = rng.choice(EVENT_KINDS), rng.choice(PLACES)
+                yield Event(
+                    title=f'{kind} at {place}',
+                    description=f'Join the {kind.lower()} at {place}.',
+                    location=place,
+                    # Two-thirds in the past, the rest upcoming.
+                    event_date=today + timedelta(days=rng.randint(-365, 180)),
+                    duration=rng.choice(['1 hour', '2 hours', 'Half day']),
+                    created_by_id=rng.choice(admins),
+                    attendee_count=size,
+                )
+
+        event_ids = self.insert(Event, rows() if admins else [])
+
+        def attendee_rows():
+            for event_id, size in zip(event_ids, sizes):
+                for user_id in rng.sample(members, size):
+                    yield EventAttendee(event_id=event_id, user_id=user_id)
+
+        self.insert(EventAttendee, attendee_rows())
+
+    def create_notices(self, rng, notices, admins):
+        def rows():
+            for i in range(notices if admins else 0):
+                kind, place = rng.choice(EVENT_KINDS), rng.choice(PLACES)
+                yield NoticeBoard(
+                    admin_id=rng.choice(admins),
+                    title=f'{kind} update for {place}',
+                    content=f'Details about the {kind.lower()} at {place}. ' + rng.choice(DETAILS),
+                    is_important=rng.random() < 0.1,
+                )
+
+        self.insert(NoticeBoard, rows())
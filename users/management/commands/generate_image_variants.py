@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from config.images import refresh_variants
+from users.signals import IMAGE_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Generate responsive WebP/JPEG variants for uploaded images that do not have them yet.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help='Rebuild variants even if they look current.')
+
+    def handle(self, *args, **options):
+        for model, field_name in IMAGE_FIELDS:
+            queryset = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+            built = failed = 0
+            for instance in queryset.only('pk', field_name, f'{field_name}_variants').iterator():
+                before = getattr(instance, f'{field_name}_variants')
+                variants = refresh_variants(instance, field_name, force=options['force'])
+                if not variants:
+                    failed += 1
+                    self.stderr.write(f'  could not read {getattr(instance, field_name).name}')
+                elif variants != before:
+                    built += 1
+            self.stdout.write(f'{model._meta.label}.{field_name}: {built} built, {failed} unreadable')
+        self.stdout.write(self.style.SUCCESS('Image variants are up to date.'))
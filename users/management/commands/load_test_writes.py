@@ -0,0 +1,104 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from events.models import Event
+from reports.models import Report
+from users.models import CustomUser
+
+
+PROFILES = ('default', 'production')
+
+
+class Command(BaseCommand):
+    help = (
+        'Hammer a scratch SQLite database with concurrent report, comment and event-join '
+        'writes from several processes, once per database profile, and compare throughput '
+        'and "database is locked" errors.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=8)
+        parser.add_argument('--writes', type=int, default=200, help='Writes per process.')
+        parser.add_argument('--profile', choices=PROFILES, action='append', help='Profile(s) to run (default: both).')
+        parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+        parser.add_argument('--start-at', type=float, help=argparse.SUPPRESS)
+
+    def handle(self, *args, **options):
+        if options['worker'] is not None:
+            self.stdout.write(json.dumps(self.work(options['worker'], options['writes'], options['start_at'])))
+            return
+
+        self.stdout.write(f"{'profile':<12} {'ok':>7} {'locked':>7} {'other':>7} {'secs':>7} {'writes/s':>9}")
+        for profile in options['profile'] or PROFILES:
+            with tempfile.TemporaryDirectory() as scratch:
+                env = {
+                    **os.environ,
+                    'DJANGO_DB_NAME': os.path.join(scratch, 'load.sqlite3'),
+                    'DJANGO_DB_PROFILE': profile,
+                    'DJANGO_SETTINGS_MODULE': os.environ.get('DJANGO_SETTINGS_MODULE', 'config.settings'),
+                }
+                migrate = self.manage(env, 'migrate', '--verbosity', '0')
+                if migrate.wait():
+                    raise CommandError(migrate.stderr.read().strip())
+                row = self.run_profile(env, options['processes'], options['writes'])
+            self.stdout.write(
+                f"{profile:<12} {row['ok']:>7} {row['locked']:>7} {row['other']:>7} "
+                f"{row['seconds']:>7.2f} {row['ok'] / row['seconds']:>9.1f}"
+            )
+
+    def manage(self, env, *args):
+        command = [sys.executable, str(settings.BASE_DIR / 'manage.py'), *args]
+        return subprocess.Popen(command, env=env, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+
+    def run_profile(self, env, processes, writes):
+        # Workers finish importing Django before the shared start time, so they really collide.
+        start_at = time.time() + 3
+        children = [
+            self.manage(env, 'load_test_writes', '--worker', str(i), '--writes', str(writes), '--start-at', str(start_at))
+            for i in range(processes)
+        ]
+        totals = {'ok': 0, 'locked': 0, 'other': 0, 'seconds': 0.0}
+        for child in children:
+            out, err = child.communicate()
+            if child.returncode:
+                raise CommandError(err.strip())
+            result = json.loads(out)
+            for key in ('ok', 'locked', 'other'):
+                totals[key] += result[key]
+            totals['seconds'] = max(totals['seconds'], result['finished'] - start_at)
+        return totals
+
+    def work(self, worker, writes, start_at):
+        user = CustomUser.objects.create(username=f'load-{worker}', is_approved=True)
+        report = Report.objects.create(title=f'Load {worker}', description='x', created_by=user)
+        event = Event.objects.create(title=f'Load {worker}', description='x', created_by=user)
+        connection.close()
+        time.sleep(max(0, start_at - time.time()))
+
+        counts = {'ok': 0, 'locked': 0, 'other': 0}
+        for i in range(writes):
+            try:
+                if i % 3 == 0:
+                    Report.objects.create(title=f'Load {worker}-{i}', description='Overflowing bins', created_by=user)
+                elif i % 3 == 1:
+                    # Read, then write, in one transaction: the shape of get_or_create()
+                    # and of most view code, and the one that deadlocks under DEFERRED.
+                    with transaction.atomic():
+                        Report.objects.get(pk=report.pk).add_comment(user, f'Comment {i}')
+                else:
+                    joiner = CustomUser.objects.create(username=f'load-{worker}-{i}', is_approved=True)
+                    event.add_attendee(joiner)
+                counts['ok'] += 1
+            except OperationalError as exc:
+                counts['locked' if 'locked' in str(exc) else 'other'] += 1
+        counts['finished'] = time.time()
+        return counts
@@ -0,0 +1,66 @@
+import os
+
+from django.core.files import File
+from django.core.management.base import BaseCommand
+
+from config.images import refresh_variants, variant_names
+from config.storage import CAS_PREFIX, media_storage
+from reports.media import sync_media_references
+from users.backends import forget_users
+from users.models import CustomUser
+from users.signals import FILE_FIELDS, IMAGE_FIELDS
+
+
+class Command(BaseCommand):
+    help = 'Move media referenced by reports, events and users into content-addressed storage.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help='Only report what would be moved.')
+        parser.add_argument('--keep-originals', action='store_true', help='Leave the old files in place.')
+
+    def handle(self, *args, **options):
+        storage = media_storage()
+        legacy_files = set()
+        moved = missing = 0
+
+        for model, field_name in FILE_FIELDS:
+            queryset = (
+                model.objects.exclude(**{field_name: ''})
+                .exclude(**{f'{field_name}__isnull': True})
+                .exclude(**{f'{field_name}__startswith': f'{CAS_PREFIX}/'})
+            )
+            has_variants = (model, field_name) in IMAGE_FIELDS
+            for instance in queryset.iterator():
+                legacy = getattr(instance, field_name).name
+                path = storage.path(legacy)
+                if not os.path.exists(path):
+                    missing += 1
+                    self.stderr.write(f'  missing: {legacy} ({model._meta.label} #{instance.pk})')
+                    continue
+                self.stdout.write(f'  {model._meta.label} #{instance.pk}: {legacy}')
+                if options['dry_run']:
+                    continue
+
+                with open(path, 'rb') as f:
+                    new_name = storage.save(legacy, File(f, name=legacy))
+                model.objects.filter(pk=instance.pk).update(**{field_name: new_name})
+                instance.__dict__[field_name] = new_name
+                legacy_files.add(legacy)
+                moved += 1
+
+                if has_variants:
+                    old_variants = variant_names(getattr(instance, f'{field_name}_variants'))
+                    legacy_files.update(n for n in old_variants if not n.startswith(f'{CAS_PREFIX}/'))
+                    refresh_variants(instance, field_name, force=True)
+                # Bare UPDATEs skip the save signals that track references and drop the cached user.
+                sync_media_references(instance)
+                if model is CustomUser:
+                    forget_users(instance.pk)
+
+        if not options['dry_run'] and not options['keep_originals']:
+            for name in legacy_files:
+                if os.path.exists(storage.path(name)):
+                    os.remove(storage.path(name))
+
+        summary = f'{moved} reference(s) moved, {len(legacy_files)} old file(s) retired, {missing} missing.'
+        self.stdout.write(self.style.SUCCESS(('Dry run: ' if options['dry_run'] else '') + summary))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from events.models import Event, EventAttendee
+from reports.models import Report, ReportComment
+
+
+def count_of(model, fk):
+    return Coalesce(
+        Subquery(
+            model.objects.filter(**{fk: OuterRef('pk')})
+            .order_by().values(fk).annotate(n=Count('*')).values('n')
+        ),
+        0,
+    )
+
+
+class Command(BaseCommand):
+    help = 'Recompute Event.attendee_count and Report.comment_count from the underlying rows.'
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            events = Event.objects.update(attendee_count=count_of(EventAttendee, 'event'))
+            reports = Report.objects.update(comment_count=count_of(ReportComment, 'report'))
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt counters for {events} event(s) and {reports} report(s).'))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from users.search import install_triggers, rebuild_index, search_available
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the full-text search index over reports, events and notices.'
+
+    def handle(self, *args, **options):
+        if not search_available():
+            raise CommandError('Full-text search needs the SQLite FTS5 backend.')
+        install_triggers()
+        count = rebuild_index()
+        self.stdout.write(self.style.SUCCESS(f'Indexed {count} document(s).'))
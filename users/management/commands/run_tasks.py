@@ -0,0 +1,25 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from config.tasks import run_pending, worker_name
+
+
+class Command(BaseCommand):
+    help = 'Run queued background tasks, polling for new ones until interrupted.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run whatever is due, then exit.')
+        parser.add_argument('--interval', type=float, default=2.0, help='Seconds to sleep when the queue is empty.')
+        parser.add_argument('--batch-size', type=int, default=10, help='Tasks to claim per round trip.')
+
+    def handle(self, *args, **options):
+        worker = worker_name()
+        while True:
+            ran = run_pending(worker, batch_size=options['batch_size'])
+            if ran:
+                self.stdout.write(f'{worker}: ran {ran} task(s).')
+            if options['once']:
+                break
+            if not ran:
+                time.sleep(options['interval'])
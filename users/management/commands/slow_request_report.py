@@ -0,0 +1,72 @@
+import glob
+import json
+import statistics
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+APPS = ('users', 'reports', 'events')
+
+
+def percentile(samples, p):
+    if len(samples) == 1:
+        return samples[0]
+    return statistics.quantiles(samples, n=100, method='inclusive')[p - 1]
+
+
+class Command(BaseCommand):
+    help = (
+        'Summarise the slow-request log (config.timing) into p50/p95/p99 tables per URL name, '
+        'plus the code that spent the most time in SQL.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--log', default=settings.SLOW_REQUEST_LOG, help='Log file; rotated backups are read too.')
+        parser.add_argument('--app', action='append', help=f"URL namespace(s) to include (default: {', '.join(APPS)}).")
+        parser.add_argument('--origins', type=int, default=10, help='How many SQL origins to list.')
+
+    def handle(self, *args, **options):
+        apps = set(options['app'] or APPS)
+        paths = sorted(glob.glob(glob.escape(options['log']) + '*'))
+        if not paths:
+            raise CommandError(f"No log at {options['log']}.")
+
+        requests = defaultdict(list)
+        origins = defaultdict(lambda: [0, 0.0])
+        for path in paths:
+            with open(path, encoding='utf-8') as log:
+                for line in log:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    name = entry.get('url_name') or ''
+                    if name.split(':', 1)[0] not in apps:
+                        continue
+                    requests[name].append(entry)
+                    for query in entry['sql']:
+                        origin = origins[query['origin'] or '(outside the project)']
+                        origin[0] += 1
+                        origin[1] += query['ms']
+
+        self.stdout.write(
+            f"{'url name':<36} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+            f"{'queries':>8} {'sql ms':>8} {'tpl ms':>8}"
+        )
+        for name, entries in sorted(requests.items()):
+            totals = [entry['total_ms'] for entry in entries]
+            self.stdout.write(
+                f'{name:<36} {len(entries):>6} {percentile(totals, 50):>9.1f} {percentile(totals, 95):>9.1f} '
+                f'{percentile(totals, 99):>9.1f} {statistics.fmean(e["queries"] for e in entries):>8.1f} '
+                f'{statistics.fmean(e["sql_ms"] for e in entries):>8.1f} '
+                f'{statistics.fmean(e["template_ms"] for e in entries):>8.1f}'
+            )
+
+        if origins and options['origins']:
+            self.stdout.write('')
+            self.stdout.write(f"{'sql origin':<60} {'queries':>8} {'total ms':>10}")
+            ranked = sorted(origins.items(), key=lambda item: item[1][1], reverse=True)
+            for origin, (count, ms) in ranked[:options['origins']]:
+                self.stdout.write(f'{origin:<60} {count:>8} {ms:>10.1f}')
@@ -0,0 +1,34 @@
+# Generated by Django 6.0 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(fields=['is_approved', 'role', '-joined_date'], name='user_approval_role_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(condition=models.Q(('is_approved', False)), fields=['-joined_date'], name='user_pending_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='noticeboard',
+            index=models.Index(fields=['-created_at'], name='notice_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userapprovalnotification',
+            index=models.Index(condition=models.Q(('is_read', False)), fields=['user', '-created_at'], name='notification_unread_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='userapprovalnotification',
+            index=models.Index(fields=['user', 'is_read', '-created_at'], name='notification_user_read_idx'),
+        ),
+    ]
@@ -0,0 +1,50 @@
+# Generated by Django 6.0 on 2026-10-18 14:40
+
+from django.db import migrations
+
+
+CREATE_SQL = [
+    "CREATE VIRTUAL TABLE search_index USING fts5("
+    "title, body, location, kind UNINDEXED, object_id UNINDEXED, visibility UNINDEXED, owner_id UNINDEXED, "
+    "tokenize = 'porter unicode61 remove_diacritics 2')",
+    "INSERT INTO search_index(search_index, rank) VALUES ('rank', 'bm25(10.0, 2.0, 4.0)')",
+    "INSERT INTO search_index(rowid, title, body, location, kind, object_id, visibility, owner_id) "
+    "SELECT id * 4 + 1, title, description, coalesce(location, ''), 'report', id, report_type, created_by_id "
+    "FROM reports_report",
+    "INSERT INTO search_index(rowid, title, body, location, kind, object_id, visibility, owner_id) "
+    "SELECT id * 4 + 2, title, description, coalesce(location, ''), 'event', id, 'public', created_by_id "
+    "FROM events_event",
+    "INSERT INTO search_index(rowid, title, body, location, kind, object_id, visibility, owner_id) "
+    "SELECT id * 4 + 3, title, content, '', 'notice', id, 'public', admin_id "
+    "FROM users_noticeboard",
+]
+
+
+def create_search_index(apps, schema_editor):
+    # FTS5 is SQLite-only; other backends simply go without search.
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for statement in CREATE_SQL:
+        schema_editor.execute(statement)
+
+
+def drop_search_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    for kind in ('report', 'event', 'notice'):
+        for event in ('insert', 'update', 'delete'):
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS search_{kind}_{event}')
+    schema_editor.execute('DROP TABLE IF EXISTS search_index')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_mediablob'),
+        ('reports', '0007_report_media_storage'),
+        ('events', '0006_event_photo_storage'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
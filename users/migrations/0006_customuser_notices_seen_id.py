@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 11:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0005_search_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customuser',
+            name='notices_seen_id',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:29
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0007_backgroundtask'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='customuser',
+            name='user_approval_role_idx',
+        ),
+        migrations.AddIndex(
+            model_name='customuser',
+            index=models.Index(condition=models.Q(('is_approved', True)), fields=['role', '-joined_date'], name='user_approved_role_idx'),
+        ),
+    ]
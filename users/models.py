@@ -2,6 +2,8 @@ from django.db import models
 from django.contrib.auth.models import AbstractUser
 from django.utils import timezone
 
+from config.storage import media_storage
+
 class CustomUser(AbstractUser):
     ROLE_CHOICES = (
         ('user', 'Community Member'),
@@ -12,14 +14,31 @@ class CustomUser(AbstractUser):
     is_approved = models.BooleanField(default=False)
     phone = models.CharField(max_length=15, blank=True, null=True)
     address = models.TextField(blank=True, null=True)
-    profile_picture = models.ImageField(upload_to='profile_pics/', blank=True, null=True)
+    profile_picture = models.ImageField(upload_to='profile_pics/', storage=media_storage, blank=True, null=True)
+    profile_picture_variants = models.JSONField(default=dict, blank=True, editable=False)
     community_name = models.CharField(max_length=255, blank=True, null=True)
     joined_date = models.DateTimeField(auto_now_add=True)
     bio = models.TextField(blank=True, null=True)
+    # Highest NoticeBoard id this user has seen; everything above it is unread.
+    notices_seen_id = models.PositiveBigIntegerField(default=0, editable=False)
     
     class Meta:
         ordering = ['-joined_date']
         verbose_name_plural = "Users"
+        indexes = [
+            # Partial on the flag: Django filters booleans as a bare column, which
+            # SQLite can't seek a composite index on.
+            models.Index(
+                fields=['role', '-joined_date'],
+                condition=models.Q(is_approved=True),
+                name='user_approved_role_idx',
+            ),
+            models.Index(
+                fields=['-joined_date'],
+                condition=models.Q(is_approved=False),
+                name='user_pending_idx',
+            ),
+        ]
     
     def __str__(self):
         return f"{self.get_full_name() or self.username}"
@@ -29,6 +48,43 @@ class CustomUser(AbstractUser):
     
     def is_active_user(self):
         return self.is_approved and self.is_active
+    
+    def unread_notice_count(self):
+        return NoticeBoard.objects.filter(id__gt=self.notices_seen_id).count()
+    
+    def mark_notices_seen(self, upto=None, newly_seen=None):
+        """
+        Move the notice watermark forward to ``upto`` (default: the newest notice).
+        
+        Callers that know how many notices this uncovers pass ``newly_seen`` so
+        the cached unread counter is adjusted instead of recounted.
+        """
+        from .backends import forget_users
+        from .notifications import adjust_unread, forget_unread
+        
+        if upto is None:
+            upto = NoticeBoard.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        if upto > self.notices_seen_id:
+            # A plain UPDATE: the watermark is not worth a full save() and its signals.
+            users = CustomUser.objects.filter(pk=self.pk)
+            # ``newly_seen`` was counted from our copy of the watermark; if a
+            # concurrent request has moved it since, the delta is wrong.
+            moved_from_ours = users.filter(notices_seen_id=self.notices_seen_id).update(notices_seen_id=upto)
+            if not moved_from_ours:
+                users.filter(notices_seen_id__lt=upto).update(notices_seen_id=upto)
+            self.notices_seen_id = upto
+            forget_users(self.pk)
+            if moved_from_ours and newly_seen is not None:
+                adjust_unread(self.pk, -newly_seen)
+            else:
+                forget_unread(self.pk)
+    
+    def mark_all_notifications_read(self):
+        from .notifications import set_unread
+        
+        self.mark_notices_seen()
+        self.approval_notifications.filter(is_read=False).update(is_read=True)
+        set_unread(self.pk, 0)
 
 
 class UserApprovalNotification(models.Model):
@@ -40,6 +96,14 @@ class UserApprovalNotification(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(
+                fields=['user', '-created_at'],
+                condition=models.Q(is_read=False),
+                name='notification_unread_idx',
+            ),
+            models.Index(fields=['user', 'is_read', '-created_at'], name='notification_user_read_idx'),
+        ]
     
     def __str__(self):
         return f"Notification for {self.user.username}"
@@ -55,6 +119,50 @@ class NoticeBoard(models.Model):
     
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['-created_at'], name='notice_recent_idx'),
+        ]
     
     def __str__(self):
         return self.title
+
+
+class MediaBlob(models.Model):
+    """Reference count for one content-addressed file in media storage."""
+    name = models.CharField(max_length=255, unique=True)
+    size = models.PositiveBigIntegerField(default=0)
+    refcount = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    def __str__(self):
+        return f"{self.name} ({self.refcount} refs)"
+
+
+class BackgroundTask(models.Model):
+    """One queued call to a ``config.tasks.task`` function, run by ``manage.py run_tasks``."""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('running', 'Running'),
+        ('failed', 'Failed'),
+    )
+    
+    name = models.CharField(max_length=200)
+    args = models.JSONField(default=list, blank=True)
+    kwargs = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['run_at', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_at'], name='task_due_idx'),
+        ]
+    
+    def __str__(self):
+        return f"{self.name} ({self.status})"
@@ -0,0 +1,70 @@
+from django.core.cache import cache
+from django.db import connection
+
+from .models import NoticeBoard, UserApprovalNotification
+
+
+NOTICE_VERSION_KEY = 'notices:version'
+UNREAD_TIMEOUT = 24 * 60 * 60
+
+
+def notice_version():
+    version = cache.get(NOTICE_VERSION_KEY)
+    if version is None:
+        cache.add(NOTICE_VERSION_KEY, 1, None)
+        version = cache.get(NOTICE_VERSION_KEY, 1)
+    return version
+
+
+def bump_notice_version():
+    """A new or removed notice changes everyone's count; orphan all of them at once."""
+    try:
+        cache.incr(NOTICE_VERSION_KEY)
+    except ValueError:
+        cache.add(NOTICE_VERSION_KEY, 1, None)
+
+
+def unread_key(user_id):
+    return f'unread:{user_id}:{notice_version()}'
+
+
+def count_unread(user):
+    """Unread approval notifications plus notices above the watermark, in one query."""
+    parts = [
+        UserApprovalNotification.objects.filter(user_id=user.pk, is_read=False),
+        NoticeBoard.objects.filter(id__gt=user.notices_seen_id),
+    ]
+    selects, params = [], []
+    for queryset in parts:
+        sql, sql_params = queryset.order_by().values('pk').query.sql_with_params()
+        selects.append(f'(SELECT COUNT(*) FROM ({sql}) AS unread_rows)')
+        params.extend(sql_params)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {' + '.join(selects)}", params)
+        return cursor.fetchone()[0]
+
+
+def unread_count(user):
+    key = unread_key(user.pk)
+    count = cache.get(key)
+    if count is None:
+        count = count_unread(user)
+        cache.set(key, count, UNREAD_TIMEOUT)
+    return count
+
+
+def adjust_unread(user_id, delta):
+    # Only adjust a counter that exists; a missing one is recounted on demand.
+    try:
+        cache.incr(unread_key(user_id), delta)
+    except ValueError:
+        pass
+
+
+def set_unread(user_id, count):
+    cache.set(unread_key(user_id), count, UNREAD_TIMEOUT)
+
+
+def forget_unread(*user_ids):
+    version = notice_version()
+    cache.delete_many([f'unread:{user_id}:{version}' for user_id in user_ids])
@@ -0,0 +1,137 @@
+import re
+
+from django.db import connection
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+
+# rowid = object id * KIND_SLOTS + kind code, so one row can be found (and
+# replaced) by primary key instead of scanning the UNINDEXED columns.
+KIND_SLOTS = 4
+KINDS = {'report': 1, 'event': 2, 'notice': 3}
+
+SOURCES = {
+    'report': {
+        'table': 'reports_report', 'title': 'title', 'body': 'description',
+        'location': 'location', 'visibility': 'report_type', 'owner': 'created_by_id',
+    },
+    'event': {
+        'table': 'events_event', 'title': 'title', 'body': 'description',
+        'location': 'location', 'visibility': None, 'owner': 'created_by_id',
+    },
+    'notice': {
+        'table': 'users_noticeboard', 'title': 'title', 'body': 'content',
+        'location': None, 'visibility': None, 'owner': 'admin_id',
+    },
+}
+
+INSERT_COLUMNS = 'rowid, title, body, location, kind, object_id, visibility, owner_id'
+
+# Column weights for bm25(): title, body, location.
+RANK = 'bm25(10.0, 2.0, 4.0)'
+
+MARK_START, MARK_END = '\x02', '\x03'
+
+
+def search_available():
+    return connection.vendor == 'sqlite'
+
+
+def _row_values(kind, p):
+    source = SOURCES[kind]
+    location = f"coalesce({p}.{source['location']}, '')" if source['location'] else "''"
+    visibility = f"{p}.{source['visibility']}" if source['visibility'] else "'public'"
+    return (
+        f"{p}.id * {KIND_SLOTS} + {KINDS[kind]}, {p}.{source['title']}, {p}.{source['body']}, "
+        f"{location}, '{kind}', {p}.id, {visibility}, {p}.{source['owner']}"
+    )
+
+
+def trigger_sql():
+    """Statements that (re)create the triggers keeping search_index in sync."""
+    statements = []
+    for kind, source in SOURCES.items():
+        table = source['table']
+        watched = ', '.join(
+            source[key] for key in ('title', 'body', 'location', 'visibility', 'owner') if source[key]
+        )
+        rowid = f'old.id * {KIND_SLOTS} + {KINDS[kind]}'
+        insert = f"INSERT INTO search_index({INSERT_COLUMNS}) VALUES ({_row_values(kind, 'new')});"
+        statements += [
+            f'DROP TRIGGER IF EXISTS search_{kind}_insert',
+            f'DROP TRIGGER IF EXISTS search_{kind}_update',
+            f'DROP TRIGGER IF EXISTS search_{kind}_delete',
+            f'CREATE TRIGGER search_{kind}_insert AFTER INSERT ON {table} BEGIN {insert} END',
+            # Only text/visibility edits reindex; counter and status bumps do not.
+            f'CREATE TRIGGER search_{kind}_update AFTER UPDATE OF {watched} ON {table} BEGIN '
+            f'DELETE FROM search_index WHERE rowid = {rowid}; {insert} END',
+            f'CREATE TRIGGER search_{kind}_delete AFTER DELETE ON {table} BEGIN '
+            f'DELETE FROM search_index WHERE rowid = {rowid}; END',
+        ]
+    return statements
+
+
+def install_triggers(using='default'):
+    """
+    Create the sync triggers. Run after every migrate: SQLite drops a table's
+    triggers whenever a migration rebuilds that table.
+    """
+    from django.db import connections
+
+    conn = connections[using]
+    if conn.vendor != 'sqlite' or 'search_index' not in conn.introspection.table_names():
+        return
+    with conn.cursor() as cursor:
+        for statement in trigger_sql():
+            cursor.execute(statement)
+
+
+def install_triggers_after_migrate(sender, using='default', **kwargs):
+    install_triggers(using)
+
+
+def rebuild_index():
+    """Repopulate search_index from the source tables; returns the row count."""
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM search_index')
+        for kind, source in SOURCES.items():
+            table = source['table']
+            cursor.execute(f'INSERT INTO search_index({INSERT_COLUMNS}) SELECT {_row_values(kind, table)} FROM {table}')
+        cursor.execute("INSERT INTO search_index(search_index) VALUES ('optimize')")
+        cursor.execute('SELECT count(*) FROM search_index')
+        return cursor.fetchone()[0]
+
+
+def to_match_query(text):
+    """Turn free text into an FTS5 query: every word must match, as a prefix."""
+    words = re.findall(r'\w+', text or '')
+    return ' '.join(f'"{word}"*' for word in words[:12])
+
+
+def _marked(text):
+    return mark_safe(escape(text).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'))
+
+
+def search(text, user, limit=30):
+    match = to_match_query(text)
+    if not match or not search_available():
+        return []
+    sql = (
+        'SELECT kind, object_id, '
+        f"highlight(search_index, 0, '{MARK_START}', '{MARK_END}'), "
+        f"snippet(search_index, 1, '{MARK_START}', '{MARK_END}', '…', 16) "
+        'FROM search_index WHERE search_index MATCH %s '
+    )
+    params = [match]
+    if not user.is_community_admin():
+        sql += "AND (visibility != 'home' OR owner_id = %s) "
+        params.append(user.id)
+    sql += 'ORDER BY rank LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    return [
+        {'kind': kind, 'id': object_id, 'title': _marked(title), 'snippet': _marked(snippet)}
+        for kind, object_id, title, snippet in rows
+    ]
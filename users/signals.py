@@ -0,0 +1,203 @@
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from config.images import variant_names, variants_are_current
+from config.live import broker
+from events.models import Event
+from reports.media import REFERENCE_FIELDS, forget_media_references, sync_media_references
+from reports.models import Report, ReportComment
+from .backends import forget_users
+from .models import CustomUser, NoticeBoard, UserApprovalNotification
+from .notifications import adjust_unread, bump_notice_version, forget_unread
+from .stats import bump_version
+from .tasks import refresh_image_variants, release_media
+
+
+IMAGE_FIELDS = [
+    (Report, 'photo'),
+    (Event, 'photo'),
+    (CustomUser, 'profile_picture'),
+]
+
+FILE_FIELDS = IMAGE_FIELDS + [
+    (Report, 'video'),
+]
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+@receiver([post_save, post_delete], sender=Report)
+@receiver([post_save, post_delete], sender=Event)
+def invalidate_landing_stats(sender, update_fields=None, **kwargs):
+    # Logins only touch last_login, which no landing-page figure depends on.
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    # After commit, or a concurrent request could cache pre-commit figures under the new version.
+    transaction.on_commit(bump_version)
+
+
+@receiver([post_save, post_delete], sender=CustomUser)
+def forget_cached_user(sender, instance, **kwargs):
+    # After commit too, or a concurrent request could re-cache the old row.
+    forget_users(instance.pk)
+    transaction.on_commit(lambda: forget_users(instance.pk))
+
+
+# serve_media checks access against MediaReference rows.
+
+@receiver(post_save, sender=CustomUser)
+@receiver(post_save, sender=Report)
+@receiver(post_save, sender=Event)
+def track_media_references(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields and not REFERENCE_FIELDS[sender] & set(update_fields)):
+        return
+    sync_media_references(instance)
+
+
+@receiver(post_delete, sender=CustomUser)
+@receiver(post_delete, sender=Report)
+@receiver(post_delete, sender=Event)
+def drop_media_references(sender, instance, **kwargs):
+    forget_media_references(instance)
+
+
+# The navbar's unread badge is a cached per-user counter; keep it in step
+# with the rows once the write has committed.
+
+@receiver(post_save, sender=UserApprovalNotification)
+def count_new_notification(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created and not instance.is_read:
+        transaction.on_commit(lambda: adjust_unread(instance.user_id, 1))
+    elif not created:
+        transaction.on_commit(lambda: forget_unread(instance.user_id))
+
+
+@receiver(post_delete, sender=UserApprovalNotification)
+def forget_deleted_notification(sender, instance, **kwargs):
+    transaction.on_commit(lambda: forget_unread(instance.user_id))
+
+
+@receiver([post_save, post_delete], sender=NoticeBoard)
+def invalidate_unread_notices(sender, created=True, raw=False, **kwargs):
+    # Edits leave the set of notice ids, and so every count, unchanged.
+    if created and not raw:
+        transaction.on_commit(bump_notice_version)
+
+
+# Live feeds (config.live) hear about a change only once it has committed.
+
+@receiver(post_init, sender=Report)
+def remember_status(sender, instance, **kwargs):
+    if 'status' in instance.__dict__:
+        instance.__dict__['_original_status'] = instance.__dict__['status']
+
+
+@receiver(post_save, sender=Report)
+def publish_status_change(sender, instance, created, raw=False, **kwargs):
+    original = instance.__dict__.get('_original_status')
+    instance.__dict__['_original_status'] = instance.status
+    if raw or created or original is None or original == instance.status:
+        return
+    topic = f'report:{instance.pk}'
+    data = {'report': instance.pk, 'status': instance.status, 'status_display': instance.get_status_display()}
+    transaction.on_commit(lambda: broker.publish(topic, 'status', data))
+
+
+@receiver(post_save, sender=ReportComment)
+def publish_comment(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    topic = f'report:{instance.report_id}'
+    data = {
+        'id': instance.pk,
+        'user': instance.user.get_full_name(),
+        'content': instance.content,
+        'created_at': instance.created_at,
+    }
+    transaction.on_commit(lambda: broker.publish(topic, 'comment', data))
+
+
+@receiver(post_save, sender=NoticeBoard)
+def publish_notice(sender, instance, created, raw=False, **kwargs):
+    if raw or not created:
+        return
+    data = {
+        'id': instance.pk,
+        'title': instance.title,
+        'content': instance.content,
+        'is_important': instance.is_important,
+        'admin': instance.admin.get_full_name(),
+        'created_at': instance.created_at,
+    }
+    transaction.on_commit(lambda: broker.publish('notices', 'notice', data))
+
+
+def _refresh_image_variants(field_name):
+    def handler(sender, instance, raw=False, update_fields=None, **kwargs):
+        if raw or (update_fields and field_name not in update_fields):
+            return
+        field_file = getattr(instance, field_name)
+        variants = getattr(instance, f'{field_name}_variants') or {}
+        if variants_are_current(field_file, variants) or not (field_file or variants):
+            return
+        result = refresh_image_variants.enqueue(sender._meta.label, instance.pk, field_name)
+        if settings.TASKS_EAGER:
+            # Ran inline; keep the caller's instance in step with the row.
+            setattr(instance, f'{field_name}_variants', result)
+    return handler
+
+
+for model, field_name in IMAGE_FIELDS:
+    post_save.connect(
+        _refresh_image_variants(field_name),
+        sender=model,
+        weak=False,
+        dispatch_uid=f'image-variants-{model._meta.label_lower}-{field_name}',
+    )
+
+
+# Media storage is reference counted: a row holds one reference per file it
+# points at, so replacing or deleting the file must give that reference back.
+
+def _release(names):
+    names = [name for name in names if name]
+    if names:
+        transaction.on_commit(lambda: release_media.enqueue(names))
+
+
+def _remember_file(field_name):
+    def handler(sender, instance, **kwargs):
+        # Read the raw column value; touching a deferred field would query.
+        if field_name in instance.__dict__:
+            instance.__dict__[f'_original_{field_name}'] = getattr(instance.__dict__[field_name], 'name', instance.__dict__[field_name])
+    return handler
+
+
+def _release_replaced_file(field_name):
+    def handler(sender, instance, raw=False, **kwargs):
+        key = f'_original_{field_name}'
+        if raw or key not in instance.__dict__ or field_name not in instance.__dict__:
+            return
+        current = getattr(instance, field_name).name
+        if instance.__dict__[key] != current:
+            _release([instance.__dict__[key]])
+            instance.__dict__[key] = current
+    return handler
+
+
+def _release_deleted_file(field_name):
+    def handler(sender, instance, **kwargs):
+        field_file = getattr(instance, field_name)
+        variants = getattr(instance, f'{field_name}_variants', None)
+        _release([field_file.name, *variant_names(variants)])
+    return handler
+
+
+for model, field_name in FILE_FIELDS:
+    uid = f'{model._meta.label_lower}-{field_name}'
+    post_init.connect(_remember_file(field_name), sender=model, weak=False, dispatch_uid=f'remember-{uid}')
+    post_save.connect(_release_replaced_file(field_name), sender=model, weak=False, dispatch_uid=f'release-{uid}')
+    post_delete.connect(_release_deleted_file(field_name), sender=model, weak=False, dispatch_uid=f'delete-{uid}')
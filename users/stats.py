@@ -0,0 +1,85 @@
+from django.core.cache import cache
+from django.db import connection
+from django.utils import timezone
+
+from events.models import Event
+from reports.models import Report
+from .models import CustomUser
+
+
+VERSION_KEY = 'landing-stats:version'
+STATS_TIMEOUT = 60 * 60
+
+
+def current_version():
+    """
+    Return {'version': int, 'modified': datetime} for the landing-page stats.
+
+    The version is bumped by model signals; cached stats are stored under a
+    key that embeds it, so a bump orphans the old entry instead of racing a
+    delete against concurrent readers.
+    """
+    state = cache.get(VERSION_KEY)
+    if state is None:
+        state = bump_version()
+    return state
+
+
+def bump_version():
+    now = timezone.now().replace(microsecond=0)
+    state = {'version': int(now.timestamp() * 1000), 'modified': now}
+    previous = cache.get(VERSION_KEY)
+    if previous and previous['version'] >= state['version']:
+        state['version'] = previous['version'] + 1
+    cache.set(VERSION_KEY, state, None)
+    return state
+
+
+def landing_stats():
+    key = f"landing-stats:{current_version()['version']}"
+    stats = cache.get(key)
+    if stats is None:
+        stats = {
+            'total_users': CustomUser.objects.filter(is_approved=True, role='user').count(),
+            'total_reports': Report.objects.filter(report_type='community').count(),
+            'total_events': Event.objects.all().count(),
+            'recent_reports': list(Report.objects.filter(report_type='community').order_by('-created_at')[:3]),
+        }
+        cache.set(key, stats, STATS_TIMEOUT)
+    return stats
+
+
+def _is_cacheable(request):
+    # Authenticated users are redirected, and a pending flash message must
+    # never be swallowed by a 304.
+    return not request.user.is_authenticated and 'messages' not in request.COOKIES
+
+
+def landing_etag(request):
+    if not _is_cacheable(request):
+        return None
+    return f"\"landing-{current_version()['version']}\""
+
+
+def landing_last_modified(request):
+    if not _is_cacheable(request):
+        return None
+    return current_version()['modified']
+
+
+def admin_summary():
+    """All four admin dashboard totals in a single round trip."""
+    totals = {
+        'total_users': CustomUser.objects.filter(is_approved=True, role='user'),
+        'total_pending': CustomUser.objects.filter(is_approved=False),
+        'total_reports': Report.objects.all(),
+        'total_events': Event.objects.all(),
+    }
+    selects, params = [], []
+    for name, queryset in totals.items():
+        sql, sql_params = queryset.order_by().values('pk').query.sql_with_params()
+        selects.append(f'(SELECT COUNT(*) FROM ({sql}) AS {name}_rows) AS {name}')
+        params.extend(sql_params)
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {', '.join(selects)}", params)
+        return dict(zip(totals, cursor.fetchone()))
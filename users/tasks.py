@@ -0,0 +1,45 @@
+from django.apps import apps
+from django.db import transaction
+
+from config.images import refresh_variants
+from config.storage import media_storage
+from config.tasks import task
+from reports.media import sync_media_references
+from .backends import forget_users
+from .models import CustomUser, UserApprovalNotification
+from .notifications import forget_unread
+
+
+@task
+def send_approval_notifications(user_ids, approved_by_id, message):
+    UserApprovalNotification.objects.bulk_create(
+        UserApprovalNotification(user_id=user_id, message=message, approved_by_id=approved_by_id)
+        for user_id in user_ids
+    )
+    # bulk_create skips the signal that keeps the unread badge in step.
+    transaction.on_commit(lambda: forget_unread(*user_ids))
+
+
+@task
+def notify_user(user_id, message):
+    UserApprovalNotification.objects.create(user_id=user_id, message=message)
+
+
+@task
+def refresh_image_variants(model_label, pk, field_name):
+    instance = apps.get_model(model_label).objects.filter(pk=pk).first()
+    if instance is None:
+        return {}
+    variants = refresh_variants(instance, field_name)
+    # The variants were written with a bare UPDATE, which fires no signals.
+    sync_media_references(instance)
+    if isinstance(instance, CustomUser):
+        forget_users(instance.pk)
+    return variants
+
+
+@task(max_attempts=5)
+def release_media(names):
+    storage = media_storage()
+    for name in names:
+        storage.delete(name)
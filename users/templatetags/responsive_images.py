@@ -0,0 +1,44 @@
+from django import template
+from django.core.files.storage import default_storage
+from django.utils.html import format_html, format_html_join
+
+
+register = template.Library()
+
+
+def _srcset(storage, widths):
+    return ', '.join(
+        f'{storage.url(name)} {width}w'
+        for width, name in sorted(widths.items(), key=lambda item: int(item[0]))
+    )
+
+
+@register.simple_tag
+def responsive_image(field_file, variants, alt='', css_class='img-fluid', sizes='100vw', style=''):
+    """
+    Render ``<picture>`` with WebP and JPEG ``srcset``s from the stored variants,
+    falling back to a plain ``<img>`` of the original when none exist yet.
+    """
+    if not field_file:
+        return ''
+    storage = getattr(field_file, 'storage', default_storage)
+    if not variants or variants.get('source') != field_file.name:
+        return format_html('<img src="{}" alt="{}" class="{}" style="{}" loading="lazy">', field_file.url, alt, css_class, style)
+
+    jpeg = variants.get('jpeg', {})
+    fallback = storage.url(jpeg[max(jpeg, key=int)]) if jpeg else field_file.url
+    sources = format_html_join(
+        '',
+        '<source type="{}" srcset="{}" sizes="{}">',
+        [('image/webp', _srcset(storage, variants['webp']), sizes)] if variants.get('webp') else [],
+    )
+    return format_html(
+        '<picture>{}<img src="{}" srcset="{}" sizes="{}" alt="{}" class="{}" style="{}" loading="lazy" decoding="async"></picture>',
+        sources,
+        fallback,
+        _srcset(storage, jpeg),
+        sizes,
+        alt,
+        css_class,
+        style,
+    )
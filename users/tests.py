@@ -1,3 +1,929 @@
-from django.test import TestCase
+import gzip
+import importlib
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import tempfile
+from datetime import timedelta
+from io import BytesIO, StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.conf import settings
+from django.contrib.messages.storage import default_storage
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.db import connection
+from django.db.utils import ConnectionHandler
+from django.template.loader import render_to_string
+from django.test import AsyncRequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from events.models import Event, EventAttendee
+from reports.models import Report, ReportComment, VideoUpload
+from config.cache import FileBasedCache
+from config.storage import media_storage
+from config.tasks import claim, run_pending, task
+from . import approvals, notifications, views
+from .backends import CachedModelBackend
+from .models import BackgroundTask, CustomUser, MediaBlob, NoticeBoard, UserApprovalNotification
+from .notifications import unread_count
+
+
+# A bare table scan, and also a walk of a whole index ("SCAN t USING [COVERING] INDEX i").
+FULL_SCAN = re.compile(r'^SCAN (\w+)\b(?: USING (?:COVERING )?INDEX (\w+))?')
+
+
+class QueryPlanTests(TestCase):
+    """Every SELECT a view issues must be answered from an index, never a bare table scan."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='head', password='pass12345', role='admin', is_approved=True)
+        cls.member = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+        CustomUser.objects.create_user(username='waiting', password='pass12345')
+        cls.report = Report.objects.create(title='Bins', description='Overflowing', created_by=cls.member)
+        Report.objects.create(title='Yard', description='Private', report_type='home', created_by=cls.member)
+        ReportComment.objects.create(report=cls.report, user=cls.admin, content='On it')
+        cls.event = Event.objects.create(title='Cleanup', description='Park', created_by=cls.admin)
+        EventAttendee.objects.create(event=cls.event, user=cls.member)
+        UserApprovalNotification.objects.create(user=cls.member, message='Approved')
+        NoticeBoard.objects.create(admin=cls.admin, title='Pickup', content='Tuesday')
+
+    def query_plans(self, url, data=None):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url, data)
+        self.assertLess(response.status_code, 400, url)
+        plans = {}
+        with connection.cursor() as cursor:
+            for query in ctx.captured_queries:
+                sql = query['sql']
+                if not sql.lstrip().upper().startswith('SELECT'):
+                    continue
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plans[sql] = [row[-1] for row in cursor.fetchall()]
+        return plans
+
+    def assert_no_full_scans(self, url, data=None, whole_tables=()):
+        """
+        Fail on any table scan or whole-index walk, except walks of a partial
+        index (it holds only the rows the filter selects) and, for the tables
+        in ``whole_tables``, index walks by an unfiltered listing or total.
+        """
+        tables = set(connection.introspection.table_names())
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND sql LIKE '% WHERE %'")
+            partial = {row[0] for row in cursor.fetchall()}
+        for sql, plan in self.query_plans(url, data).items():
+            scans = []
+            for line in plan:
+                match = FULL_SCAN.match(line)
+                if not match or match.group(1) not in tables:
+                    continue
+                table, index = match.groups()
+                if index in partial or (index and table in whole_tables):
+                    continue
+                scans.append(line)
+            self.assertFalse(scans, f'{url} full scan:\n{sql}\n{plan}')
+
+    def test_anonymous_pages(self):
+        # The landing stats count every event.
+        self.assert_no_full_scans(reverse('users:index'), whole_tables={'events_event'})
+
+    def test_member_pages(self):
+        self.client.force_login(self.member)
+        for name in ['users:dashboard', 'users:account', 'users:settings']:
+            self.assert_no_full_scans(reverse(name))
+        # Every notice, newest first: an ordered walk of notice_recent_idx.
+        self.assert_no_full_scans(reverse('users:noticeboard'), whole_tables={'users_noticeboard'})
+        # Without a status filter the list is the newest page of reports: an
+        # ordered walk of report_recent_idx that stops at the page size.
+        self.assert_no_full_scans(reverse('reports:report_list'), whole_tables={'reports_report'})
+        for status in ['pending', 'resolved']:
+            self.assert_no_full_scans(reverse('reports:report_list'), {'status': status})
+        # Upcoming and past each keep a large share of all events, so walking
+        # event_recent_idx until the page fills (~0.3 ms over 20k events) beats
+        # seeking event_date_recent_idx and sorting the range (11-25 ms).
+        for filter_type in ['upcoming', 'past']:
+            self.assert_no_full_scans(reverse('events:event_list'), {'filter': filter_type}, whole_tables={'events_event'})
+        self.assert_no_full_scans(reverse('reports:report_detail', args=[self.report.pk]))
+        self.assert_no_full_scans(reverse('events:event_detail', args=[self.event.pk]))
+
+    def test_admin_pages(self):
+        self.client.force_login(self.admin)
+        # The totals count every report and event.
+        self.assert_no_full_scans(reverse('users:admin_dashboard'), whole_tables={'reports_report', 'events_event'})
+        for section in ['pending', 'approved']:
+            self.assert_no_full_scans(reverse('users:admin_dashboard_section', args=[section]))
+        for section, table in [('reports', 'reports_report'), ('events', 'events_event')]:
+            self.assert_no_full_scans(reverse('users:admin_dashboard_section', args=[section]), whole_tables={table})
+        self.assert_no_full_scans(reverse('reports:report_list'), whole_tables={'reports_report'})
+        self.assert_no_full_scans(reverse('reports:report_list'), {'status': 'pending'})
+
+
+def seed_rows(n, admin, member):
+    """Bulk-insert n rows of every kind of content a page can list."""
+    today = timezone.now().date()
+    CustomUser.objects.bulk_create(
+        CustomUser(username=f'seed{n}_{i}', password='!', is_approved=bool(i % 2)) for i in range(n)
+    )
+    Report.objects.bulk_create(
+        Report(
+            title=f'Report {i}',
+            description='Overflowing bins',
+            report_type='home' if i % 4 == 0 else 'community',
+            status=('pending', 'in_progress', 'resolved')[i % 3],
+            created_by=member if i % 2 else admin,
+        )
+        for i in range(n)
+    )
+    Event.objects.bulk_create(
+        Event(title=f'Event {i}', description='Cleanup', event_date=today + timedelta(days=i % 7 - 3), created_by=admin)
+        for i in range(n)
+    )
+    report = Report.objects.filter(report_type='community').first()
+    event = Event.objects.first()
+    users = list(CustomUser.objects.filter(username__startswith=f'seed{n}_'))
+    ReportComment.objects.bulk_create(ReportComment(report=report, user=u, content='+1') for u in users)
+    EventAttendee.objects.bulk_create(EventAttendee(event=event, user=u) for u in users)
+    UserApprovalNotification.objects.bulk_create(UserApprovalNotification(user=member, message='Hi') for _ in range(n))
+    NoticeBoard.objects.bulk_create(NoticeBoard(admin=admin, title=f'Notice {i}', content='Pickup') for i in range(n))
+    return report, event
+
+
+class QueryBudgetTests(TestCase):
+    """Each page costs a fixed number of queries regardless of how many rows it shows (cold page caches)."""
+
+    SIZES = (10, 100, 1000)
+
+    # (url name, arg, who, budget); arg names a seeded object or is passed
+    # through literally. Session and user come from the cache.
+    BUDGETS = [
+        ('users:index', None, None, 4),
+        ('users:register', None, None, 0),
+        ('users:login', None, None, 0),
+        ('users:logout', None, 'member', 2),
+        ('users:pending', None, 'waiting', 0),
+        ('users:dashboard', None, 'member', 4),
+        ('users:account', None, 'member', 3),
+        ('users:noticeboard', None, 'member', 2),
+        ('users:settings', None, 'member', 1),
+        ('users:admin_dashboard', None, 'admin', 1),
+        ('users:admin_dashboard_section', 'pending', 'admin', 1),
+        ('users:admin_dashboard_section', 'approved', 'admin', 1),
+        ('users:admin_dashboard_section', 'reports', 'admin', 1),
+        ('users:admin_dashboard_section', 'events', 'admin', 1),
+        ('users:search', None, 'member', 1),
+        ('reports:report_list', None, 'member', 1),
+        ('reports:create_report', None, 'member', 0),
+        ('reports:report_detail', 'report', 'member', 2),
+        ('reports:delete_report', 'report', 'admin', 1),
+        ('events:event_list', None, 'member', 1),
+        ('events:create_event', None, 'member', 0),
+        ('events:event_detail', 'event', 'member', 2),
+        ('events:delete_event', 'event', 'admin', 1),
+        ('reports:video_upload', 'upload', 'member', 1),
+        ('api:report_list', None, 'member', 1),
+        ('api:comment_list', 'report', 'member', 2),
+        ('api:event_list', None, 'member', 1),
+        ('api:notice_list', None, 'member', 1),
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = {
+            'admin': CustomUser.objects.create_user(username='head', password='pass12345', role='admin', is_approved=True),
+            'member': CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True),
+            'waiting': CustomUser.objects.create_user(username='waiting', password='pass12345'),
+        }
+
+    def test_budgets_hold_as_rows_grow(self):
+        for n in self.SIZES:
+            objects = dict(zip(('report', 'event'), seed_rows(n, self.users['admin'], self.users['member'])))
+            objects['upload'] = VideoUpload.objects.create(
+                report=objects['report'], user=self.users['member'], filename='clip.mp4',
+                content_type='video/mp4', total_size=1024,
+            )
+            for name, arg, who, budget in self.BUDGETS:
+                url = reverse(name, args=[objects[arg].pk if arg in objects else arg] if arg else None)
+                if name == 'users:search':
+                    url += '?q=report'
+                with self.subTest(url=url, rows=n):
+                    self.client.logout()
+                    cache.clear()
+                    if who:
+                        self.client.force_login(self.users[who])
+                        # Budgets cover the hot path, with the session, the user and
+                        # the navbar's unread counter cached.
+                        CachedModelBackend().get_user(self.users[who].pk)
+                        unread_count(self.users[who])
+                    with self.assertNumQueries(budget):
+                        response = self.client.get(url)
+                    self.assertLess(response.status_code, 400)
+
+
+class LandingStatsCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_repeat_visit_is_served_from_cache(self):
+        self.client.get(reverse('users:index'))
+        with self.assertNumQueries(0):
+            response = self.client.get(reverse('users:index'))
+        self.assertEqual(response.context['total_users'], 1)
+
+    def test_conditional_get_returns_304_without_queries(self):
+        first = self.client.get(reverse('users:index'))
+        self.assertTrue(first.has_header('ETag'))
+        self.assertTrue(first.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            second = self.client.get(reverse('users:index'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+    def test_saving_a_report_invalidates(self):
+        first = self.client.get(reverse('users:index'))
+        with self.captureOnCommitCallbacks(execute=True):
+            Report.objects.create(title='Bins', description='x', created_by=self.member)
+            # Not yet: the new figures aren't visible to other connections before commit.
+            self.assertEqual(self.client.get(reverse('users:index'), HTTP_IF_NONE_MATCH=first['ETag']).status_code, 304)
+        second = self.client.get(reverse('users:index'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.context['total_reports'], 1)
+
+    def test_login_does_not_invalidate(self):
+        first = self.client.get(reverse('users:index'))
+        self.client.post(reverse('users:login'), {'username': 'member', 'password': 'pass12345'})
+        self.client.logout()
+        second = self.client.get(reverse('users:index'), HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(second.status_code, 304)
+
+    def test_authenticated_users_get_no_validators(self):
+        self.client.force_login(self.member)
+        response = self.client.get(reverse('users:index'))
+        self.assertFalse(response.has_header('ETag'))
+
+
+class AdminDashboardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='head', password='pass12345', role='admin', is_approved=True)
+        CustomUser.objects.bulk_create(CustomUser(username=f'waiting{i}', password='!') for i in range(25))
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_page_carries_summary_only(self):
+        response = self.client.get(reverse('users:admin_dashboard'))
+        self.assertEqual(response.context['total_pending'], 25)
+        self.assertNotContains(response, 'waiting0')
+
+    def test_section_pages_follow_cursor(self):
+        url = reverse('users:admin_dashboard_section', args=['pending'])
+        first = self.client.get(url)
+        self.assertEqual(len(first.context['page']), 20)
+        second = self.client.get(url, {'cursor': first['X-Next-Cursor']})
+        self.assertEqual(len(second.context['page']), 5)
+        self.assertFalse(second.has_header('X-Next-Cursor'))
+
+    def test_unknown_section_is_404(self):
+        response = self.client.get(reverse('users:admin_dashboard_section', args=['nope']))
+        self.assertEqual(response.status_code, 404)
+
+    def test_members_cannot_load_sections(self):
+        member = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+        self.client.force_login(member)
+        response = self.client.get(reverse('users:admin_dashboard_section', args=['pending']))
+        self.assertEqual(response.status_code, 403)
+
+    def test_ajax_approve_returns_fresh_summary(self):
+        user = CustomUser.objects.get(username='waiting0')
+        response = self.client.post(
+            reverse('users:admin_dashboard'),
+            {'action': 'approve', 'user_id': user.id},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(response.json()['summary']['total_pending'], 24)
+        self.assertTrue(UserApprovalNotification.objects.filter(user=user).exists())
+
+    def test_plain_post_still_redirects(self):
+        user = CustomUser.objects.get(username='waiting1')
+        response = self.client.post(reverse('users:admin_dashboard'), {'action': 'reject', 'user_id': user.id})
+        self.assertRedirects(response, reverse('users:admin_dashboard'))
+        self.assertFalse(CustomUser.objects.filter(pk=user.pk).exists())
+
+    def test_bulk_approve_is_set_based(self):
+        waiting = CustomUser.objects.filter(is_approved=False)
+        ids = list(waiting.values_list('id', flat=True)[:20])
+        # Admin user (the session comes from the cache), UPDATE ... RETURNING and one notification INSERT.
+        with self.assertNumQueries(3 + 2):
+            response = self.client.post(reverse('users:admin_dashboard'), {'action': 'approve', 'user_ids': ids + [self.admin.id]})
+        self.assertRedirects(response, reverse('users:admin_dashboard'), fetch_redirect_response=False)
+        self.assertEqual(CustomUser.objects.filter(id__in=ids, is_approved=True).count(), 20)
+        self.assertEqual(UserApprovalNotification.objects.filter(user_id__in=ids).count(), 20)
+        self.assertFalse(UserApprovalNotification.objects.filter(user=self.admin).exists())
+
+    def test_users_approved_meanwhile_are_not_notified_again(self):
+        waiting = CustomUser.objects.filter(username__in=['waiting1', 'waiting2'])
+        self.assertEqual(approvals.approve_users(waiting.filter(username='waiting1'), self.admin), 1)
+        # A second admin submits both, one of them already approved.
+        self.assertEqual(approvals.approve_users(waiting, self.admin), 1)
+        self.assertEqual(UserApprovalNotification.objects.filter(user__in=waiting).count(), 2)
+
+    def test_bulk_reject_leaves_approved_users_alone(self):
+        ids = list(CustomUser.objects.filter(is_approved=False).values_list('id', flat=True)[:3])
+        response = self.client.post(
+            reverse('users:admin_dashboard'),
+            {'action': 'reject', 'user_ids': ids + [self.admin.id]},
+            HTTP_X_REQUESTED_WITH='XMLHttpRequest',
+        )
+        self.assertEqual(response.json()['message'], '3 user(s) rejected and deleted.')
+        self.assertTrue(CustomUser.objects.filter(pk=self.admin.pk).exists())
+        self.assertEqual(response.json()['summary']['total_pending'], 22)
+
+    def test_approval_bumps_landing_stats(self):
+        from .stats import current_version
+
+        before = current_version()['version']
+        with self.captureOnCommitCallbacks(execute=True):
+            approvals.approve_users(CustomUser.objects.filter(username='waiting2'), self.admin)
+        self.assertGreater(current_version()['version'], before)
+
+
+def png_bytes(color=(200, 40, 40)):
+    from PIL import Image
+
+    buffer = BytesIO()
+    Image.new('RGB', (400, 200), color).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.storage = media_storage()
+
+    def test_identical_uploads_share_one_file(self):
+        data = png_bytes()
+        first = Event.objects.create(title='A', description='x', created_by=self.member, photo=ContentFile(data, 'a.png'))
+        self.member.profile_picture = ContentFile(data, 'me.png')
+        self.member.save()
+
+        self.assertEqual(first.photo.name, self.member.profile_picture.name)
+        self.assertTrue(first.photo.name.startswith('cas/'))
+        self.assertEqual(self.storage.refcount(first.photo.name), 2)
+        self.assertEqual(first.photo_variants, self.member.profile_picture_variants)
+
+    def test_shared_file_survives_until_last_reference(self):
+        data = png_bytes()
+        a = Report.objects.create(title='A', description='x', created_by=self.member, photo=ContentFile(data, 'a.png'))
+        b = Report.objects.create(title='B', description='x', created_by=self.member, photo=ContentFile(data, 'b.png'))
+        name, variant = a.photo.name, a.photo_variants['webp']['320']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            a.delete()
+        self.assertTrue(self.storage.exists(name))
+        self.assertTrue(self.storage.exists(variant))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            b.delete()
+        self.assertFalse(self.storage.exists(name))
+        self.assertFalse(self.storage.exists(variant))
+        self.assertFalse(MediaBlob.objects.exists())
+
+    def test_replacing_a_file_releases_the_old_one(self):
+        self.member.profile_picture = ContentFile(png_bytes(), 'old.png')
+        self.member.save()
+        old = self.member.profile_picture.name
+
+        member = CustomUser.objects.get(pk=self.member.pk)
+        member.profile_picture = ContentFile(png_bytes((10, 10, 200)), 'new.png')
+        with self.captureOnCommitCallbacks(execute=True):
+            member.save()
+        self.assertFalse(self.storage.exists(old))
+        self.assertEqual(self.storage.refcount(member.profile_picture.name), 1)
+
+    def test_migration_command_rewrites_legacy_media(self):
+        data = png_bytes()
+        for legacy in ['events/photos/shot.png', 'profile_pics/shot.png']:
+            os.makedirs(os.path.join(self.media_root, os.path.dirname(legacy)), exist_ok=True)
+            with open(os.path.join(self.media_root, legacy), 'wb') as f:
+                f.write(data)
+        event = Event.objects.create(title='A', description='x', created_by=self.member)
+        Event.objects.filter(pk=event.pk).update(photo='events/photos/shot.png')
+        CustomUser.objects.filter(pk=self.member.pk).update(profile_picture='profile_pics/shot.png')
+        cache.clear()
+        CachedModelBackend().get_user(self.member.pk)
+
+        call_command('migrate_media_to_cas', stdout=StringIO(), stderr=StringIO())
+
+        event.refresh_from_db()
+        self.member.refresh_from_db()
+        self.assertEqual(event.photo.name, self.member.profile_picture.name)
+        self.assertEqual(self.storage.refcount(event.photo.name), 2)
+        self.assertFalse(os.path.exists(os.path.join(self.media_root, 'events/photos/shot.png')))
+        self.assertEqual(event.photo_variants['source'], event.photo.name)
+        cached = CachedModelBackend().get_user(self.member.pk)
+        self.assertEqual(cached.profile_picture.name, self.member.profile_picture.name)
+        self.assertEqual(cached.profile_picture_variants, self.member.profile_picture_variants)
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='head', password='pass12345', role='admin', is_approved=True)
+        cls.member = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+        cls.other = CustomUser.objects.create_user(username='other', password='pass12345', is_approved=True)
+        cls.titled = Report.objects.create(title='Plastic dumping', description='Bags by the river', created_by=cls.member)
+        cls.mentioned = Report.objects.create(title='Bins', description='Some plastic left behind', created_by=cls.member)
+        cls.private = Report.objects.create(title='Compost', description='My plastic compost bin', report_type='home', created_by=cls.other)
+        cls.event = Event.objects.create(title='River cleanup', description='Bring gloves', location='Plastics yard', created_by=cls.admin)
+        cls.notice = NoticeBoard.objects.create(title='Collection day', content='Plastic goes out on Monday', admin=cls.admin)
+
+    def results(self, user, q):
+        self.client.force_login(user)
+        return self.client.get(reverse('users:search'), {'q': q}).context['results']
+
+    def test_title_matches_rank_first_with_highlight(self):
+        results = self.results(self.member, 'plast')
+        self.assertEqual((results[0]['kind'], results[0]['id']), ('report', self.titled.pk))
+        self.assertEqual(results[0]['title'], '<mark>Plastic</mark> dumping')
+        kinds = {(r['kind'], r['id']) for r in results}
+        self.assertIn(('event', self.event.pk), kinds)
+        self.assertIn(('notice', self.notice.pk), kinds)
+
+    def test_home_reports_only_visible_to_owner_and_admins(self):
+        found = lambda user: ('report', self.private.pk) in {(r['kind'], r['id']) for r in self.results(user, 'compost')}
+        self.assertFalse(found(self.member))
+        self.assertTrue(found(self.other))
+        self.assertTrue(found(self.admin))
+
+    def test_index_follows_edits_and_deletes(self):
+        Report.objects.filter(pk=self.mentioned.pk).update(description='Glass bottles')
+        self.assertFalse(any(r['id'] == self.mentioned.pk for r in self.results(self.member, 'plastic') if r['kind'] == 'report'))
+        self.assertEqual(self.results(self.member, 'glass')[0]['id'], self.mentioned.pk)
+
+        self.event.delete()
+        self.assertEqual(self.results(self.member, 'gloves'), [])
+
+    def test_markup_in_content_is_escaped(self):
+        Report.objects.create(title='<b>Loud</b> burning', description='x', created_by=self.member)
+        self.assertEqual(self.results(self.member, 'loud')[0]['title'], '&lt;b&gt;<mark>Loud</mark>&lt;/b&gt; burning')
+
+    def test_rebuild_command_restores_index(self):
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM search_index')
+        self.assertEqual(self.results(self.member, 'river'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(len(self.results(self.member, 'river')), 2)
+
+
+class NoticeWatermarkTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='head', password='pass12345', role='admin', is_approved=True)
+        cls.member = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+        NoticeBoard.objects.bulk_create(NoticeBoard(admin=cls.admin, title=f'Notice {i}', content='x') for i in range(30))
+
+    def test_posting_a_notice_writes_one_row(self):
+        self.client.force_login(self.admin)
+        # User and a single INSERT, however many members there are.
+        with self.assertNumQueries(2):
+            self.client.post(reverse('users:noticeboard'), {'title': 'Pickup moved', 'content': 'Wednesday'})
+        self.assertEqual(self.member.unread_notice_count(), 31)
+
+    def test_visiting_the_board_advances_the_watermark(self):
+        self.client.force_login(self.member)
+        response = self.client.get(reverse('users:noticeboard'))
+        self.assertContains(response, 'NEW', count=30)
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.unread_notice_count(), 0)
+
+        NoticeBoard.objects.create(admin=self.admin, title='Fresh', content='x')
+        response = self.client.get(reverse('users:noticeboard'))
+        self.assertContains(response, 'NEW', count=1)
+
+    def test_edited_notice_replaces_cached_fragment(self):
+        self.client.force_login(self.member)
+        self.client.get(reverse('users:noticeboard'))
+        notice = NoticeBoard.objects.get(title='Notice 0')
+        notice.content = 'Moved to Friday'
+        notice.save()
+        self.assertContains(self.client.get(reverse('users:noticeboard')), 'Moved to Friday')
+
+    def test_mark_all_read_is_constant_work(self):
+        UserApprovalNotification.objects.create(user=self.member, message='Approved')
+        self.client.force_login(self.member)
+        # User, newest notice id, watermark UPDATE, notifications UPDATE.
+        with self.assertNumQueries(4):
+            self.client.post(reverse('users:mark_notifications_read'))
+        self.member.refresh_from_db()
+        self.assertEqual(self.member.unread_notice_count(), 0)
+        self.assertFalse(self.member.approval_notifications.filter(is_read=False).exists())
+
+
+
+class CachedUserTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='head', password='pass12345', role='admin', is_approved=True)
+        cls.waiting = CustomUser.objects.create_user(username='waiting', password='pass12345')
+
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_request_needs_no_queries(self):
+        self.client.force_login(self.waiting)
+        self.client.get(reverse('users:pending'))
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(reverse('users:pending')).status_code, 200)
+
+    def test_approval_is_seen_on_the_next_request(self):
+        self.client.force_login(self.waiting)
+        self.client.get(reverse('users:pending'))
+        with self.captureOnCommitCallbacks(execute=True):
+            approvals.approve_users(CustomUser.objects.filter(pk=self.waiting.pk), self.admin)
+        self.assertRedirects(self.client.get(reverse('users:pending')), reverse('users:dashboard'), fetch_redirect_response=False)
+
+    def test_role_change_and_deactivation_are_seen(self):
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get(reverse('users:admin_dashboard')).status_code, 200)
+        self.admin.role = 'member'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.admin.save()
+        self.assertNotEqual(self.client.get(reverse('users:admin_dashboard')).status_code, 200)
+
+        self.admin.is_active = False
+        self.admin.save()
+        self.assertRedirects(
+            self.client.get(reverse('users:dashboard')),
+            f"{reverse('users:login')}?next={reverse('users:dashboard')}",
+            fetch_redirect_response=False,
+        )
+
+    def test_profile_edit_only_writes_its_fields(self):
+        self.client.force_login(self.admin)
+        self.client.get(reverse('users:account'))
+        # A change the cached copy hasn't seen yet.
+        CustomUser.objects.filter(pk=self.admin.pk).update(community_name='Riverside')
+        self.client.post(reverse('users:account'), {'first_name': 'Ada', 'last_name': 'L', 'email': 'a@example.com', 'phone': '', 'bio': ''})
+        admin = CustomUser.objects.get(pk=self.admin.pk)
+        self.assertEqual(admin.first_name, 'Ada')
+        self.assertEqual(admin.community_name, 'Riverside')
+
+
+class UnreadCounterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='head', password='pass12345', role='admin', is_approved=True)
+        cls.member = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+        NoticeBoard.objects.create(admin=cls.admin, title='Pickup', content='Tuesday')
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.member)
+
+    def badge(self):
+        return self.client.get(reverse('reports:report_list')).context['unread_count']
+
+    def test_warm_counter_costs_no_queries(self):
+        self.assertEqual(self.badge(), 1)
+        member = CustomUser.objects.get(pk=self.member.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(unread_count(member), 1)
+
+    def test_counter_follows_writes(self):
+        self.assertEqual(self.badge(), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            UserApprovalNotification.objects.create(user=self.member, message='Approved')
+        self.assertEqual(self.badge(), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            NoticeBoard.objects.create(admin=self.admin, title='Moved', content='Wednesday')
+        self.assertEqual(self.badge(), 3)
+
+        self.client.get(reverse('users:noticeboard'))
+        self.assertEqual(self.badge(), 1)
+        self.client.post(reverse('users:mark_notifications_read'))
+        self.assertEqual(self.badge(), 0)
+        self.assertEqual(notifications.count_unread(CustomUser.objects.get(pk=self.member.pk)), 0)
+
+    def test_concurrent_notice_board_loads_count_once(self):
+        notice = NoticeBoard.objects.create(admin=self.admin, title='Moved', content='Wednesday')
+        self.assertEqual(self.badge(), 2)
+        # Two requests loaded the user before either moved the watermark.
+        first, second = CustomUser.objects.get(pk=self.member.pk), CustomUser.objects.get(pk=self.member.pk)
+        first.mark_notices_seen(notice.id, newly_seen=2)
+        second.mark_notices_seen(notice.id, newly_seen=2)
+        self.assertEqual(self.badge(), 0)
+
+    def test_bulk_approval_resets_counters(self):
+        waiting = CustomUser.objects.create_user(username='waiting', password='pass12345')
+        with self.captureOnCommitCallbacks(execute=True):
+            approvals.approve_users(CustomUser.objects.filter(pk=waiting.pk), self.admin)
+        self.client.force_login(waiting)
+        self.assertEqual(self.badge(), 2)
+
+
+FLAKY_CALLS = []
+
+
+@task(max_attempts=2)
+def flaky_task(fail_times):
+    FLAKY_CALLS.append(fail_times)
+    if len(FLAKY_CALLS) <= fail_times:
+        raise RuntimeError('try again')
+
+
+@override_settings(TASKS_EAGER=False, TASKS_RETRY_DELAY=0)
+class BackgroundTaskTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user(username='head', password='pass12345', role='admin', is_approved=True)
+        CustomUser.objects.bulk_create(CustomUser(username=f'waiting{i}', password='!') for i in range(3))
+
+    def setUp(self):
+        FLAKY_CALLS.clear()
+
+    def test_approval_notifications_are_deferred(self):
+        self.client.force_login(self.admin)
+        ids = list(CustomUser.objects.filter(is_approved=False).values_list('id', flat=True))
+        self.client.post(reverse('users:admin_dashboard'), {'action': 'approve', 'user_ids': ids})
+        self.assertEqual(CustomUser.objects.filter(id__in=ids, is_approved=True).count(), 3)
+        self.assertFalse(UserApprovalNotification.objects.exists())
+
+        self.assertEqual(run_pending(), 1)
+        self.assertEqual(UserApprovalNotification.objects.filter(user_id__in=ids).count(), 3)
+        self.assertFalse(BackgroundTask.objects.exists())
+
+    def test_failures_retry_then_give_up(self):
+        flaky_task.enqueue(1)
+        with self.assertLogs('config.tasks', 'ERROR'):
+            self.assertEqual(run_pending(), 2)
+        self.assertFalse(BackgroundTask.objects.exists())
+
+        job = flaky_task.enqueue(5)
+        with self.assertLogs('config.tasks', 'ERROR') as logs:
+            run_pending()
+        self.assertEqual(len(logs.records), 2)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ('failed', 2))
+        self.assertIn('try again', job.last_error)
+
+    def test_stale_running_tasks_are_reclaimed(self):
+        job = flaky_task.enqueue(0)
+        self.assertEqual(claim('dead-worker'), [job])
+        self.assertEqual(claim('live-worker'), [])
+        BackgroundTask.objects.filter(pk=job.pk).update(started_at=timezone.now() - timedelta(hours=1))
+        call_command('run_tasks', '--once', stdout=StringIO())
+        self.assertEqual(FLAKY_CALLS, [0])
+        self.assertFalse(BackgroundTask.objects.exists())
+
+
+class AsyncDashboardTests(TransactionTestCase):
+    # Committed rows, so the concurrent queries' own connections can see them.
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+        Report.objects.create(title='Overflowing bins', description='x', created_by=self.user)
+        Event.objects.create(title='River cleanup', description='x', created_by=self.user)
+
+    async def get(self, view, user=None):
+        user = user or self.user
+        request = AsyncRequestFactory().get('/')
+
+        async def auser():
+            return user
+
+        request.auser = auser
+        request.session = SessionStore()
+        request._messages = default_storage(request)
+        return await view(request)
+
+    async def test_dashboard_renders_concurrent_results(self):
+        response = await self.get(views.dashboard_async)
+        self.assertContains(response, 'Overflowing bins')
+        self.assertContains(response, 'River cleanup')
+
+    @override_settings(ASYNC_QUERY_CONCURRENCY=False)
+    async def test_sequential_fallback(self):
+        response = await self.get(views.account_profile_async)
+        self.assertContains(response, 'Overflowing bins')
+
+    async def test_pending_users_are_redirected(self):
+        waiting = await CustomUser.objects.acreate(username='waiting')
+        response = await self.get(views.dashboard_async, waiting)
+        self.assertEqual(response.url, reverse('users:pending'))
+
+
+class SqliteProductionProfileTests(SimpleTestCase):
+    def test_pragmas_apply_on_connect(self):
+        scratch = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, scratch)
+        handler = ConnectionHandler({
+            'default': {},
+            'scratch': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.path.join(scratch, 'db.sqlite3'), **settings.SQLITE_PRODUCTION},
+        })
+        conn = handler['scratch']
+        self.addCleanup(conn.close)
+        with conn.cursor() as cursor:
+            pragmas = {}
+            for name in ('journal_mode', 'synchronous', 'busy_timeout', 'foreign_keys'):
+                cursor.execute(f'PRAGMA {name}')
+                pragmas[name] = cursor.fetchone()[0]
+        self.assertEqual(pragmas, {'journal_mode': 'wal', 'synchronous': 1, 'busy_timeout': 20000, 'foreign_keys': 1})
+        self.assertEqual(conn.transaction_mode, 'IMMEDIATE')
+
+
+class ProductionSettingsTests(SimpleTestCase):
+    def load(self):
+        with mock.patch.dict(os.environ, {'DJANGO_SECRET_KEY': 'test-only', 'DJANGO_ALLOWED_HOSTS': 'a.example,b.example'}):
+            sys.modules.pop('config.settings_production', None)
+            self.addCleanup(sys.modules.pop, 'config.settings_production', None)
+            return importlib.import_module('config.settings_production')
+
+    def test_overrides(self):
+        production = self.load()
+        self.assertFalse(production.DEBUG)
+        self.assertFalse(production.TASKS_EAGER)
+        self.assertEqual(production.ALLOWED_HOSTS, ['a.example', 'b.example'])
+        self.assertEqual(production.DATABASES['default']['OPTIONS']['transaction_mode'], 'IMMEDIATE')
+        template_options = production.TEMPLATES[0]['OPTIONS']
+        self.assertFalse(production.TEMPLATES[0]['APP_DIRS'])
+        self.assertEqual(template_options['loaders'][0][0], 'django.template.loaders.cached.Loader')
+        self.assertNotIn('django.template.context_processors.debug', template_options['context_processors'])
+        self.assertEqual(production.CACHES['default']['BACKEND'], 'config.cache.FileBasedCache')
+
+    def test_leaves_base_settings_alone(self):
+        from config import settings as base
+        self.load()
+        self.assertTrue(base.TEMPLATES[0]['APP_DIRS'])
+        self.assertNotIn('transaction_mode', base.DATABASES['default'].get('OPTIONS', {}))
+
+    def test_requires_secret_key(self):
+        environ = {key: value for key, value in os.environ.items() if key != 'DJANGO_SECRET_KEY'}
+        with mock.patch.dict(os.environ, environ, clear=True), self.assertRaises(KeyError):
+            sys.modules.pop('config.settings_production', None)
+            importlib.import_module('config.settings_production')
+
+
+class SharedFileCacheTests(SimpleTestCase):
+    def setUp(self):
+        location = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, location)
+        self.cache = FileBasedCache(location, {'OPTIONS': {'MAX_ENTRIES': 5, 'CULL_FREQUENCY': 0}})
+
+    def test_culling_keeps_entries_without_timeout(self):
+        self.cache.set('notices:version', 7, None)
+        for i in range(20):
+            self.cache.set(f'unread:{i}', i, 60)
+        self.assertEqual(self.cache.get('notices:version'), 7)
+        self.assertLess(len(self.cache._list_cache_files()), 20)
+
+    def test_incr(self):
+        self.cache.set('notices:version', 1, None)
+        self.assertEqual(self.cache.incr('notices:version'), 2)
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+
+
+class StaticFilesTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.static_root = tempfile.mkdtemp()
+        cls.addClassCleanup(shutil.rmtree, cls.static_root)
+        cls.enterClassContext(override_settings(
+            STATIC_ROOT=cls.static_root,
+            STORAGES={**settings.STORAGES, 'staticfiles': {'BACKEND': 'config.staticfiles.CompressedManifestStaticFilesStorage'}},
+            MIDDLEWARE=['config.staticfiles.StaticFilesMiddleware', *settings.MIDDLEWARE],
+        ))
+        call_command('collectstatic', interactive=False, verbosity=0)
+        cls.hashed = staticfiles_storage.stored_name('css/style.css')
+
+    def test_collectstatic_writes_hashed_and_compressed_copies(self):
+        self.assertRegex(self.hashed, r'^css/style\.[0-9a-f]{12}\.css$')
+        with open(os.path.join(self.static_root, self.hashed), 'rb') as original, \
+                open(os.path.join(self.static_root, self.hashed + '.gz'), 'rb') as compressed:
+            self.assertEqual(gzip.decompress(compressed.read()), original.read())
+
+    def test_hashed_name_is_immutable_and_negotiated(self):
+        response = self.client.get('/static/' + self.hashed, headers={'Accept-Encoding': 'gzip, deflate'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Content-Type'], 'text/css; charset=utf-8')
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('Accept-Encoding', response['Vary'])
+        with open(os.path.join(self.static_root, self.hashed), 'rb') as original:
+            self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), original.read())
+
+        identity = self.client.get('/static/' + self.hashed, headers={'Accept-Encoding': 'gzip;q=0'})
+        self.assertNotIn('Content-Encoding', identity)
+        self.assertNotEqual(identity['ETag'], response['ETag'])
+        identity.close()
+
+        cached = self.client.get('/static/' + self.hashed, headers={'Accept-Encoding': 'gzip', 'If-None-Match': response['ETag']})
+        self.assertEqual(cached.status_code, 304)
+
+    def test_base_template_only_links_collected_files(self):
+        # The manifest storage raises for a name collectstatic never saw.
+        self.assertIn(self.hashed, render_to_string('base/base.html'))
+
+    def test_unhashed_name_revalidates(self):
+        response = self.client.get('/static/css/style.css')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('immutable', response['Cache-Control'])
+        response.close()
+
+    def test_unknown_and_escaping_paths_fall_through(self):
+        self.assertEqual(self.client.get('/static/css/missing.css').status_code, 404)
+        self.assertEqual(self.client.get('/static/../config/settings.py').status_code, 404)
+        self.assertEqual(self.client.get('/static/%2e%2e/config/settings.py').status_code, 404)
+
+
+class ServerTimingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.member = CustomUser.objects.create_user(username='member', password='pass12345', is_approved=True)
+
+    def setUp(self):
+        cache.clear()
+        self.client.force_login(self.member)
+
+    def test_header_reports_queries_and_phases(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('users:dashboard'))
+        metrics = dict(part.strip().split(';', 1) for part in response['Server-Timing'].split(','))
+        self.assertEqual(set(metrics), {'db', 'tpl', 'view', 'total'})
+        self.assertIn(f'desc="{len(queries)} queries"', metrics['db'])
+        self.assertNotEqual(metrics['tpl'], 'dur=0.0')
+
+    def test_slow_requests_are_logged_and_summarised(self):
+        from config import timing
+
+        log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, log_dir)
+        log_path = os.path.join(log_dir, 'slow.jsonl')
+        logger = logging.getLogger('config.timing.slow')
+        self.addCleanup(setattr, timing, '_slow_log', None)
+        self.addCleanup(lambda: [(logger.removeHandler(h), h.close()) for h in list(logger.handlers)])
+        timing._slow_log = None
+
+        with override_settings(SLOW_REQUEST_MS=0, SLOW_REQUEST_LOG=log_path):
+            self.client.get(reverse('users:dashboard'))
+            self.client.get(reverse('users:dashboard'))
+            self.client.get(reverse('reports:report_list'))
+
+        with open(log_path) as log:
+            entries = [json.loads(line) for line in log]
+        self.assertEqual([entry['url_name'] for entry in entries], ['users:dashboard', 'users:dashboard', 'reports:report_list'])
+        self.assertEqual(entries[0]['queries'], len(entries[0]['sql']))
+        self.assertTrue(any((query['origin'] or '').startswith('users/views.py') for query in entries[0]['sql']))
+
+        out = StringIO()
+        call_command('slow_request_report', log=log_path, stdout=out)
+        rows = {line.split()[0]: line.split() for line in out.getvalue().splitlines() if line}
+        self.assertEqual(rows['users:dashboard'][1], '2')
+        self.assertEqual(rows['reports:report_list'][1], '1')
+
+
+class SyntheticDataTests(TestCase):
+    def test_generated_rows_are_consistent_and_benchmarkable(self):
+        call_command(
+            'generate_data', users=40, admins=2, reports=60, comments=150, events=5, attendees=50, notices=7,
+            batch_size=16, seed=1, stdout=StringIO(),
+        )
+        self.assertEqual(CustomUser.objects.count(), 42)
+        self.assertEqual(Report.objects.count(), 60)
+        self.assertEqual(set(Report.objects.values_list('report_type', flat=True)), {'home', 'community'})
+        self.assertEqual(ReportComment.objects.count(), 150)
+        self.assertEqual(NoticeBoard.objects.count(), 7)
+        for report in Report.objects.all():
+            self.assertEqual(report.comment_count, report.comments.count())
+        for event in Event.objects.all():
+            self.assertEqual(event.attendee_count, event.attendees.count())
+        self.assertTrue(CustomUser.objects.get(username__endswith='-0').check_password('synthetic-pass'))
+
+        out = StringIO()
+        call_command('bench_urls', requests=2, warmup=0, json=True, stdout=out, stderr=StringIO())
+        results = json.loads(out.getvalue())
+        self.assertIn('reports:report_detail', {row['name'] for row in results})
+        self.assertTrue(all(row['status'] < 400 for row in results), results)
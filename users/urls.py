@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
@@ -8,10 +9,17 @@ urlpatterns = [
     path('register/', views.register, name='register'),
     path('login/', views.user_login, name='login'),
     path('logout/', views.user_logout, name='logout'),
-    path('dashboard/', views.dashboard, name='dashboard'),
+    path('dashboard/', views.dashboard_async if settings.ASYNC_VIEWS else views.dashboard, name='dashboard'),
     path('pending-approval/', views.pending_approval, name='pending'),
-    path('account/', views.account_profile, name='account'),
+    path('account/', views.account_profile_async if settings.ASYNC_VIEWS else views.account_profile, name='account'),
     path('noticeboard/', views.notice_board, name='noticeboard'),
+    path('notifications/read/', views.mark_notifications_read, name='mark_notifications_read'),
     path('settings/', views.settings, name='settings'),
+    path('search/', views.search, name='search'),
     path('admin-dashboard/', views.admin_dashboard, name='admin_dashboard'),
+    path('admin-dashboard/<str:section>/', views.admin_dashboard_section, name='admin_dashboard_section'),
 ]
+
+# The SSE feeds hold their connection open; only ASGI serves them cheaply.
+if settings.ASYNC_VIEWS:
+    urlpatterns.append(path('noticeboard/live/', views.noticeboard_live, name='noticeboard_live'))
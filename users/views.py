@@ -1,32 +1,33 @@
+from asgiref.sync import sync_to_async
 from django.shortcuts import render, redirect
+from django.http import Http404, HttpResponseForbidden, JsonResponse
 from django.contrib.auth import authenticate, login, logout
 from django.contrib.auth.decorators import login_required
 from django.contrib import messages
-from django.views.decorators.http import require_http_methods
+from django.views.decorators.http import require_http_methods, condition
 from django.db.models import Q
-from .models import CustomUser, NoticeBoard, UserApprovalNotification
+from django.utils.cache import patch_vary_headers
+from .models import CustomUser, NoticeBoard
 from reports.models import Report
 from events.models import Event
+from .stats import landing_stats, landing_etag, landing_last_modified, admin_summary
+from . import approvals
+from . import search as fulltext
+from config.async_views import arender, gather_queries, request_user
+from config.live import live_updates_enabled, stream_response
+from config.pagination import paginate_by_cursor
 
 
+@condition(etag_func=landing_etag, last_modified_func=landing_last_modified)
 def index(request):
     if request.user.is_authenticated:
         if not request.user.is_approved:
             return redirect('users:pending')
         return redirect('users:dashboard')
     
-    total_users = CustomUser.objects.filter(is_approved=True, role='user').count()
-    total_reports = Report.objects.filter(report_type='community').count()
-    total_events = Event.objects.all().count()
-    recent_reports = Report.objects.filter(report_type='community').order_by('-created_at')[:3]
-    
-    context = {
-        'total_users': total_users,
-        'total_reports': total_reports,
-        'total_events': total_events,
-        'recent_reports': recent_reports,
-    }
-    return render(request, 'users/index.html', context)
+    response = render(request, 'users/index.html', landing_stats())
+    patch_vary_headers(response, ['Cookie'])
+    return response
 
 
 @require_http_methods(["GET", "POST"])
@@ -115,18 +116,33 @@ def dashboard(request):
     
     user_reports = Report.objects.filter(created_by=request.user).order_by('-created_at')[:5]
     user_events = Event.objects.filter(created_by=request.user).order_by('-created_at')[:5]
-    notifications = UserApprovalNotification.objects.filter(user=request.user, is_read=False)[:5]
     
     context = {
         'user_reports': user_reports,
         'user_events': user_events,
-        'notifications': notifications,
         'all_reports_count': Report.objects.filter(created_by=request.user).count(),
         'all_events_count': Event.objects.filter(created_by=request.user).count(),
     }
     return render(request, 'users/dashboard.html', context)
 
 
+@login_required(login_url='users:login')
+async def dashboard_async(request):
+    """``dashboard`` for ASGI, running its independent queries concurrently."""
+    user = await request_user(request)
+    if not user.is_approved:
+        messages.warning(request, 'Your account is pending approval.')
+        return redirect('users:pending')
+    
+    context = await gather_queries(
+        user_reports=lambda: list(Report.objects.filter(created_by=user).order_by('-created_at')[:5]),
+        user_events=lambda: list(Event.objects.filter(created_by=user).order_by('-created_at')[:5]),
+        all_reports_count=Report.objects.filter(created_by=user).count,
+        all_events_count=Event.objects.filter(created_by=user).count,
+    )
+    return await arender(request, 'users/dashboard.html', context)
+
+
 @login_required(login_url='users:login')
 def account_profile(request):
     if not request.user.is_approved:
@@ -139,10 +155,13 @@ def account_profile(request):
         request.user.phone = request.POST.get('phone', request.user.phone)
         request.user.bio = request.POST.get('bio', request.user.bio)
         
+        # request.user may come from the cache; only write what this form edits.
+        fields = ['first_name', 'last_name', 'email', 'phone', 'bio']
         if 'profile_picture' in request.FILES:
             request.user.profile_picture = request.FILES['profile_picture']
+            fields.append('profile_picture')
         
-        request.user.save()
+        request.user.save(update_fields=fields)
         messages.success(request, 'Profile updated successfully!')
         return redirect('users:account')
     
@@ -157,12 +176,30 @@ def account_profile(request):
     return render(request, 'users/account.html', context)
 
 
+@login_required(login_url='users:login')
+async def account_profile_async(request):
+    """``account_profile`` for ASGI; updates still go through the sync view."""
+    if request.method == 'POST':
+        return await sync_to_async(account_profile)(request)
+    
+    user = await request_user(request)
+    if not user.is_approved:
+        return redirect('users:pending')
+    
+    context = await gather_queries(
+        user_reports=lambda: list(Report.objects.filter(created_by=user)),
+        user_events=lambda: list(Event.objects.filter(created_by=user)),
+        admin_info=CustomUser.objects.filter(role='admin', is_approved=True).first,
+    )
+    return await arender(request, 'users/account.html', context)
+
+
 @login_required(login_url='users:login')
 def notice_board(request):
     if not request.user.is_approved:
         return redirect('users:pending')
     
-    notices = NoticeBoard.objects.all().order_by('-created_at')
+    notices = NoticeBoard.objects.select_related('admin').order_by('-created_at')
     
     if request.user.is_community_admin():
         if request.method == 'POST':
@@ -179,10 +216,36 @@ def notice_board(request):
             messages.success(request, 'Notice posted successfully!')
             return redirect('users:noticeboard')
     
-    context = {'notices': notices}
+    notices = list(notices)
+    # Notices above the watermark render as new on this visit, then count as seen.
+    seen_id = request.user.notices_seen_id
+    if notices:
+        request.user.mark_notices_seen(
+            max(notice.id for notice in notices),
+            newly_seen=sum(notice.id > seen_id for notice in notices),
+        )
+    
+    context = {'notices': notices, 'seen_id': seen_id, 'live_updates': live_updates_enabled()}
     return render(request, 'users/noticeboard.html', context)
 
 
+@login_required(login_url='users:login')
+async def noticeboard_live(request):
+    """SSE feed of newly posted notices."""
+    user = await request.auser()
+    if not user.is_approved:
+        return HttpResponseForbidden()
+    return stream_response(request, ['notices'])
+
+
+@login_required(login_url='users:login')
+@require_http_methods(["POST"])
+def mark_notifications_read(request):
+    request.user.mark_all_notifications_read()
+    messages.success(request, 'All notifications marked as read.')
+    return redirect('users:dashboard')
+
+
 @login_required(login_url='users:login')
 def settings(request):
     if not request.user.is_approved:
@@ -202,7 +265,7 @@ def settings(request):
                 messages.error(request, 'New passwords do not match!')
             else:
                 request.user.set_password(new_password)
-                request.user.save()
+                request.user.save(update_fields=['password'])
                 login(request, request.user)
                 messages.success(request, 'Password changed successfully!')
         
@@ -224,6 +287,14 @@ def user_logout(request):
     return redirect('users:index')
 
 
+ADMIN_SECTIONS = {
+    'pending': (lambda: CustomUser.objects.filter(is_approved=False), 'joined_date'),
+    'approved': (lambda: CustomUser.objects.filter(is_approved=True, role='user'), 'joined_date'),
+    'reports': (lambda: Report.objects.select_related('created_by'), 'created_at'),
+    'events': (lambda: Event.objects.select_related('created_by'), 'created_at'),
+}
+
+
 @login_required(login_url='users:login')
 @require_http_methods(["GET", "POST"])
 def admin_dashboard(request):
@@ -231,43 +302,65 @@ def admin_dashboard(request):
         messages.error(request, 'Access Denied! Admin only.')
         return redirect('users:dashboard')
     
-    pending_users = CustomUser.objects.filter(is_approved=False).order_by('-joined_date')
-    approved_users = CustomUser.objects.filter(is_approved=True, role='user').order_by('-joined_date')
-    all_reports = Report.objects.all().order_by('-created_at')
-    all_events = Event.objects.all().order_by('-created_at')
-    
     if request.method == 'POST':
         action = request.POST.get('action')
-        user_id = request.POST.get('user_id')
+        user_ids = [i for i in request.POST.getlist('user_ids') or request.POST.getlist('user_id') if i.isdigit()]
+        is_ajax = request.headers.get('X-Requested-With') == 'XMLHttpRequest'
+        # Only pending accounts can be approved or rejected from here.
+        selected = CustomUser.objects.filter(id__in=user_ids, is_approved=False)
         
-        try:
-            user_to_update = CustomUser.objects.get(id=user_id)
-            
-            if action == 'approve':
-                user_to_update.is_approved = True
-                user_to_update.save()
-                UserApprovalNotification.objects.create(
-                    user=user_to_update,
-                    message=f'Your account has been approved by {request.user.get_full_name()}!',
-                    approved_by=request.user
-                )
-                messages.success(request, f'{user_to_update.username} has been approved!')
-            
-            elif action == 'reject':
-                user_to_update.delete()
-                messages.success(request, f'{user_to_update.username} has been rejected and deleted.')
+        if action not in ('approve', 'reject'):
+            level, message, done = messages.ERROR, 'Unknown action!', 0
+        elif not user_ids:
+            level, message, done = messages.ERROR, 'No users selected!', 0
+        elif action == 'approve':
+            done = approvals.approve_users(selected, request.user)
+            level, message = messages.SUCCESS, f'{done} user(s) approved!'
+        else:
+            done = approvals.reject_users(selected)
+            level, message = messages.SUCCESS, f'{done} user(s) rejected and deleted.'
         
-        except CustomUser.DoesNotExist:
-            messages.error(request, 'User not found!')
+        if level == messages.SUCCESS and not done:
+            level, message = messages.ERROR, 'User not found!'
         
+        if is_ajax:
+            return JsonResponse(
+                {'ok': level == messages.SUCCESS, 'message': message, 'summary': admin_summary()},
+                status=200 if level == messages.SUCCESS else 400,
+            )
+        messages.add_message(request, level, message)
         return redirect('users:admin_dashboard')
     
+    return render(request, 'users/admin_dashboard.html', admin_summary())
+
+
+@login_required(login_url='users:login')
+def admin_dashboard_section(request, section):
+    if not request.user.is_community_admin():
+        return HttpResponseForbidden()
+    if section not in ADMIN_SECTIONS:
+        raise Http404
+    
+    queryset, field = ADMIN_SECTIONS[section]
+    page = paginate_by_cursor(queryset(), request.GET.get('cursor'), field=field)
+    
+    response = render(request, f'users/admin_sections/{section}.html', {'page': page})
+    if page.has_next:
+        response['X-Next-Cursor'] = page.next_cursor
+    return response
+
+
+@login_required(login_url='users:login')
+def search(request):
+    if not request.user.is_approved:
+        return redirect('users:pending')
+    
+    query = request.GET.get('q', '').strip()
+    results = fulltext.search(query, request.user) if query else []
+    
     context = {
-        'pending_users': pending_users,
-        'approved_users': approved_users,
-        'all_reports': all_reports,
-        'all_events': all_events,
-        'total_users': approved_users.count(),
-        'total_pending': pending_users.count(),
+        'query': query,
+        'results': results,
+        'search_available': fulltext.search_available(),
     }
-    return render(request, 'users/admin_dashboard.html', context)
\ No newline at end of file
+    return render(request, 'users/search.html', context)